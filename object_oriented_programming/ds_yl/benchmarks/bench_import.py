@@ -0,0 +1,86 @@
+'''
+Import time benchmark for dsyl
+
+Every repeat starts a fresh interpreter, times `import dsyl` and then the
+first access to a plot function, which loads dsyl.commonfunctions with
+numpy and pandas. The run fails when the median import time is over the
+budget, when `import dsyl` loaded any heavy dependency, or when getting
+the plot function loaded matplotlib, seaborn or sklearn.
+
+Usage:
+    python benchmarks/bench_import.py [--budget-ms 20] [--repeat 7]
+
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ['numpy', 'pandas', 'matplotlib', 'seaborn', 'sklearn']
+
+CHILD = '''
+import json, sys, time
+heavy = {heavy!r}
+start = time.perf_counter()
+import dsyl
+imported = time.perf_counter()
+loaded_import = [name for name in heavy if name in sys.modules]
+dsyl.plot_missing
+accessed = time.perf_counter()
+loaded_access = [name for name in heavy if name in sys.modules]
+print(json.dumps({{'import_ms': (imported - start) * 1000,
+                  'access_ms': (accessed - imported) * 1000,
+                  'loaded_import': loaded_import, 'loaded_access': loaded_access}}))
+'''.format(heavy = HEAVY)
+
+
+def measure_import(repeat):
+    '''
+    This function times the package import in `repeat` fresh interpreters
+
+    '''
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', CHILD], cwd = ROOT,
+                             check = True, capture_output = True, text = True)
+        runs.append(json.loads(out.stdout))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Import time benchmark for dsyl')
+    parser.add_argument('--budget-ms', type = float, default = 20.0)
+    parser.add_argument('--repeat', type = int, default = 7)
+    args = parser.parse_args()
+
+    runs = measure_import(args.repeat)
+    median = statistics.median(run['import_ms'] for run in runs)
+    access = statistics.median(run['access_ms'] for run in runs)
+    loaded_import = sorted(set(name for run in runs for name in run['loaded_import']))
+    loaded_access = sorted(set(name for run in runs for name in run['loaded_access'])
+                           - {'numpy', 'pandas'})
+
+    print('import dsyl: median {:.1f} ms over {} runs (budget {:.0f} ms)'.format(
+        median, args.repeat, args.budget_ms))
+    print('first access to dsyl.plot_missing: median {:.1f} ms'.format(access))
+
+    failed = False
+    if loaded_import:
+        print('FAIL: importing dsyl loaded {}'.format(', '.join(loaded_import)))
+        failed = True
+    if loaded_access:
+        print('FAIL: getting a plot function loaded {}'.format(', '.join(loaded_access)))
+        failed = True
+    if median > args.budget_ms:
+        print('FAIL: import time is over budget')
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,2 +1,79 @@
+'''
+Names of dsyl are loaded on first use, so `import dsyl` does not import
+numpy, pandas, matplotlib, seaborn or sklearn. The plot functions import
+matplotlib and seaborn when they are called. `from dsyl import *` still
+gives every name, and so loads everything.
 
-from .commonfunctions import *
\ No newline at end of file
+'''
+import importlib
+
+# name: (module, attribute)
+_LAZY = {
+    'np': ('numpy', None),
+    'pd': ('pandas', None),
+    'plt': ('matplotlib.pyplot', None),
+    'sns': ('seaborn', None),
+    'ticker': ('matplotlib.ticker', None),
+    'itertools': ('itertools', None),
+    'train_test_split': ('sklearn.model_selection', 'train_test_split'),
+    'GridSearchCV': ('sklearn.model_selection', 'GridSearchCV'),
+    'cross_val_score': ('sklearn.model_selection', 'cross_val_score'),
+    'StratifiedKFold': ('sklearn.model_selection', 'StratifiedKFold'),
+    'recall_score': ('sklearn.metrics', 'recall_score'),
+    'accuracy_score': ('sklearn.metrics', 'accuracy_score'),
+    'confusion_matrix': ('sklearn.metrics', 'confusion_matrix'),
+    'roc_auc_score': ('sklearn.metrics', 'roc_auc_score'),
+    'roc_curve': ('sklearn.metrics', 'roc_curve'),
+    'auc': ('sklearn.metrics', 'auc'),
+    'LogisticRegression': ('sklearn.linear_model', 'LogisticRegression'),
+    'RidgeCV': ('sklearn.linear_model', 'RidgeCV'),
+    'LassoCV': ('sklearn.linear_model', 'LassoCV'),
+    'Ridge': ('sklearn.linear_model', 'Ridge'),
+    'Lasso': ('sklearn.linear_model', 'Lasso'),
+}
+
+for _name in ['plot_missing', 'plot_corr', 'plot_unique', 'plot_distribution',
+              'plot_confusion_matrix', 'show_data', 'plot_roc', 'plot_confusion',
+              'plot_importance']:
+    _LAZY[_name] = ('.commonfunctions', _name)
+
+for _name in ['missing_counts', 'correlation', 'top_correlations', 'category_counts',
+              'top_categories', 'class_distribution', 'profile', 'Profile']:
+    _LAZY[_name] = ('.profiling', _name)
+
+for _name in ['threshold_sweep', 'predict_scores', 'curves_from_scores', 'evaluate_models',
+              'permutation_importance', 'feature_importance', 'fingerprint',
+              'clear_importance_cache', 'confusion_matrices', 'confusion_metrics']:
+    _LAZY[_name] = ('.evaluation', _name)
+
+for _name in ['column_specs', 'render_report']:
+    _LAZY[_name] = ('.report', _name)
+
+for _name in ['fold_splits', 'clear_split_cache', 'cross_validate', 'grid_search']:
+    _LAZY[_name] = ('.modeling', _name)
+
+del _name
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name):
+    '''
+    This function imports the module of a name on first access and keeps
+    the value, so later accesses are plain attribute lookups
+
+    '''
+    if name not in _LAZY:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+    module, attribute = _LAZY[name]
+    value = importlib.import_module(module, __name__)
+    if attribute is not None:
+        value = getattr(value, attribute)
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
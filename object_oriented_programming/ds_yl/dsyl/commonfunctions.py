@@ -1,6 +1,5 @@
 
 '''
-Import useful packages such as Numpy, Matplotlib, Seaborn, Pandas
 Define utility functions:
 
 plot_missing
@@ -8,31 +7,42 @@ plot_corr
 plot_unique
 plot_distribution
 
+profile (data too large for memory)
+
+Matplotlib, Seaborn and sklearn are imported by the functions that use
+them, so importing this module only costs numpy and pandas.
+
 '''
 # 
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import matplotlib.ticker as ticker
-import itertools
-
-# sklearn
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import recall_score
-from sklearn.metrics import accuracy_score
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import confusion_matrix
-from sklearn.metrics import roc_auc_score, roc_curve, auc
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import GridSearchCV, train_test_split, cross_val_score
-from sklearn.model_selection import StratifiedKFold
-from sklearn.linear_model import RidgeCV, LassoCV, Ridge, Lasso
+
+# profiling engine
+from .profiling import missing_counts, correlation, top_correlations, profile, Profile
+from .profiling import category_counts, top_categories, class_distribution
+
+# evaluation engine
+from .evaluation import threshold_sweep, evaluate_models, feature_importance
+from .evaluation import confusion_matrices, confusion_metrics
 
 def plot_missing(df):
+    '''
+    This function plots the share and count of missing values per column.
+    The nulls are counted in one pass over row blocks, or read from a
+    Profile.
+    
+    '''
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import matplotlib.ticker as ticker
+    
+    if isinstance(df, Profile):
+        counts, rows = df.missing(), df.rows
+    else:
+        counts, rows = missing_counts(df), len(df)
 
     fig, ax = plt.subplots(figsize = (15,8))
-    miss = df.apply(lambda x: x.isnull().sum() / len(df)).sort_values(ascending = False)
+    miss = (counts / max(rows, 1)).sort_values(ascending = False)
 
     # Formatting ax
     ax = sns.barplot(y = miss.values, x = miss.index)
@@ -51,11 +61,11 @@ def plot_missing(df):
 
     # formatting ax2
     ax2 = ax.twinx()
-    ax2.set_ylim(0, len(df))
+    ax2.set_ylim(0, rows)
     ax2.set_ylabel('Count of Missing')
 
-    # Use a MultipleLocator to ensure a tick spacing of 10
-    ax2.yaxis.set_major_locator(ticker.MultipleLocator(10000))
+    # Use a MaxNLocator so tall frames do not get thousands of ticks
+    ax2.yaxis.set_major_locator(ticker.MaxNLocator())
     ax2.set_yticklabels(['{:,.0f}K'.format(x/1000) for x in ax2.get_yticks()])
 
     plt.title('Missing Value')
@@ -63,15 +73,36 @@ def plot_missing(df):
     sns.despine()
     plt.show()
 
-def plot_corr(df, figsize):
+def plot_corr(df, figsize, method = 'auto', error = 0.01, top_k = None, random_state = None):
     '''
     This function plots the correlation plot between numeric variables
     
+    The matrix is accumulated blockwise over rows, or on a random sample of
+    rows large enough that all coefficients are within `error` of the
+    exact values at once with 95% confidence (see correlation, whose
+    attrs['error'] gives the bound achieved; method = 'auto' samples only
+    when that is fewer rows). With
+    top_k, only the variables of the k most correlated pairs are shown.
+    df can also be a Profile, whose exact matrix is used.
+    Returns the correlation matrix and, with top_k, the top pairs.
+    
     '''
-    corr = df.select_dtypes(['float64', 'int64']).corr()
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    if isinstance(df, Profile):
+        corr = df.corr()
+    else:
+        corr = correlation(df, method = method, error = error, random_state = random_state)
+    
+    pairs = None
+    if top_k is not None:
+        pairs = top_correlations(corr, top_k)
+        keep = pd.unique(pairs[['var1', 'var2']].to_numpy().ravel())
+        corr = corr.loc[keep, keep]
     
     # Generate a mask for the upper triangle
-    mask = np.zeros_like(corr, dtype = np.bool)
+    mask = np.zeros_like(corr, dtype = bool)
     
     mask[np.triu_indices_from(mask)] = True
     
@@ -90,13 +121,37 @@ def plot_corr(df, figsize):
     sns.despine()
     plt.tight_layout()
     plt.show()
+    
+    if pairs is not None:
+        return corr, pairs
+    return corr
 
 
-def plot_unique(df, col, show_count = False, show_percent = False, fontsize = 15, figsize = (15,8), hue = None): 
+def plot_unique(df, col, show_count = False, show_percent = False, fontsize = 15, figsize = (15,8), hue = None,
+                top_k = None): 
+    '''
+    This function plots the count of each value of a column, optionally
+    split by hue. The counts are computed first with one groupby, or read
+    from a Profile that kept the value counts of col (hue being its
+    target), and only they are drawn. With top_k, the values beyond the k
+    most frequent are folded into 'other'.
+    Returns the counts that were drawn.
+    
+    '''
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    if isinstance(df, Profile):
+        counts = df.value_counts(col, hue)
+    else:
+        counts = category_counts(df, col, hue)
+    if top_k is not None:
+        counts = top_categories(counts, col, top_k)
     
     fig, ax = plt.subplots(figsize = figsize)
     
-    ax = sns.countplot(x = col, hue = hue, data = df)
+    ax = sns.barplot(x = col, y = 'count', hue = hue, data = counts, errorbar = None, ax = ax,
+                     order = list(dict.fromkeys(counts[col])))
     
     # show exact number on each bar
     if show_count:
@@ -136,15 +191,82 @@ def plot_unique(df, col, show_count = False, show_percent = False, fontsize = 15
     fig.tight_layout()
     sns.despine()
     plt.show()
+    
+    return counts
 
-def plot_distribution(df, col, target, figsize = (15,8)):
+def _binned_kde(counts, edges):
+    '''
+    This function smooths histogram counts with a gaussian kernel of
+    Scott's bandwidth, a kernel density estimate that only needs the bins
     
-    fig, axes = plt.subplots(nrows = 2, figsize = figsize)
+    '''
+    total = counts.sum()
+    width = edges[1] - edges[0]
+    centers = (edges[:-1] + edges[1:]) / 2
+    mean = np.dot(counts, centers) / total
+    std = np.sqrt(np.dot(counts, (centers - mean) ** 2) / total)
+    bandwidth = max(1.06 * std * total ** (-1 / 5), width / 2)
+    
+    reach = min(int(np.ceil(4 * bandwidth / width)), len(counts))
+    offsets = np.arange(-reach, reach + 1) * width
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel)[reach:reach + len(counts)]
+    return centers, density / (density.sum() * width)
+
+def _plot_class_distribution(edges, counts, quantiles, col, target, axes, kde = True):
+    '''
+    This function draws the box plot and the histogram of a numeric
+    column per target class from binned counts and quantiles
+    
+    '''
+    stats = []
+    for label, (low, q1, med, q3, high) in quantiles.iterrows():
+        if np.isnan([low, q1, med, q3, high]).any():
+            continue
+        iqr = q3 - q1
+        stats.append({'label': label, 'q1': q1, 'med': med, 'q3': q3,
+                      'whislo': max(low, q1 - 1.5 * iqr), 'whishi': min(high, q3 + 1.5 * iqr)})
+    axes[0].bxp(stats, showfliers = False)
+    axes[0].set_xlabel(target)
+    axes[0].set_ylabel(col)
     
-    for _ in sorted(df[target].unique().tolist()):
-        sns.distplot(df[df[target] == _][col], hist = True, rug = False, label = _)
+    # only draw the bins that hold values
+    used = np.flatnonzero(counts.to_numpy().sum(axis = 1))
+    if len(used):
+        first, last = used[0], used[-1] + 1
+        window = edges[first:last + 1]
+        for label in counts.columns:
+            values = counts[label].to_numpy()[first:last]
+            if not values.sum():
+                continue
+            stairs = axes[1].stairs(values / values.sum() / np.diff(window), window,
+                                    fill = True, alpha = 0.4, label = label)
+            if kde:
+                axes[1].plot(*_binned_kde(values, window), color = stairs.get_facecolor(), alpha = 1)
+    axes[1].set_xlabel(col)
     
-    ax = sns.boxplot(x = target, y = col, data = df, ax = axes[0])
+    return axes[0]
+
+def plot_distribution(df, col, target, figsize = (15,8), bins = 50, kde = True):
+    '''
+    This function plots the distribution of a column by response group.
+    The histograms and box plot quantiles of every group are computed
+    first with one bincount and one groupby (see class_distribution), or
+    read from a Profile built with target, and only they are drawn. kde
+    adds a kernel density estimate computed from the bins.
+    
+    '''
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    if isinstance(df, Profile):
+        edges, counts, quantiles = df.class_distribution(col, target)
+    else:
+        edges, counts, quantiles = class_distribution(df, col, target, bins)
+    
+    fig, axes = plt.subplots(nrows = 2, figsize = figsize)
+    
+    ax = _plot_class_distribution(edges, counts, quantiles, col, target, axes, kde)
     
     plt.legend(loc = 'upper right', frameon = False)
     ax.set_title('distribution of {} by response group'.format(col))
@@ -156,11 +278,17 @@ def plot_distribution(df, col, target, figsize = (15,8)):
 def plot_confusion_matrix(cm, classes,
                           normalize=False,
                           title='Confusion matrix',
-                          cmap=plt.cm.Blues):
+                          cmap=None):
     """
     This function prints and plots the confusion matrix.
     Normalization can be applied by setting `normalize=True`.
+    cmap defaults to the Blues colormap.
     """
+    import matplotlib.pyplot as plt
+    
+    if cmap is None:
+        cmap = plt.cm.Blues
+    
     plt.imshow(cm, interpolation='nearest', cmap=cmap)
     plt.title(title)
     plt.colorbar()
@@ -169,12 +297,13 @@ def plot_confusion_matrix(cm, classes,
     plt.yticks(tick_marks, classes)
     
     if normalize:
-        cm = cm.astype('float') / cm.sum(axis=1)[:, np.newaxis]
-    thresh = cm.max() / 2.
-    for i, j in itertools.product(range(cm.shape[0]), range(cm.shape[1])):
-        plt.text(j, i, cm[i, j],
+        rows = cm.sum(axis=1)[:, np.newaxis]
+        cm = np.divide(cm.astype('float'), rows, out=np.zeros(cm.shape), where=rows != 0)
+    colors = np.where(cm > cm.max() / 2., 'white', 'black')
+    for (i, j), value in np.ndenumerate(cm):
+        plt.text(j, i, value,
                  horizontalalignment="center",
-                 color="white" if cm[i, j] > thresh else "black")
+                 color=colors[i, j])
 
     plt.tight_layout()
     plt.ylabel('True label')
@@ -182,28 +311,53 @@ def plot_confusion_matrix(cm, classes,
     plt.show()
 
 def show_data(cm, print_res = 0):
-    tp = cm[1,1]
-    fn = cm[1,0]
-    fp = cm[0,1]
-    tn = cm[0,0]
+    '''
+    This function returns precision, recall and fallout of a 2 x 2
+    confusion matrix, or arrays of them for a (k, 2, 2) stack, with 0
+    where a ratio is undefined. See confusion_metrics for f1, mcc and
+    multiclass matrices.
+    
+    '''
+    metrics = confusion_metrics(cm)
+    pr, tpr, fpr = metrics['precision'], metrics['recall'], metrics['fpr']
+    if np.ndim(pr) == 0:
+        pr, tpr, fpr = float(pr), float(tpr), float(fpr)
+    show = lambda x: '{:.3f}'.format(x) if np.ndim(x) == 0 else np.array2string(x, precision = 3)
     if print_res == 1:
-        print('Precision =     {:.3f}'.format(tp/(tp+fp)))
-        print('Recall (TPR) =  {:.3f}'.format(tp/(tp+fn)))
-        print('Fallout (FPR) = {:.3f}'.format(fp/(fp+tn)))
-    return tp/(tp+fp), tp/(tp+fn), fp/(fp+tn)
+        print('Precision =     {}'.format(show(pr)))
+        print('Recall (TPR) =  {}'.format(show(tpr)))
+        print('Fallout (FPR) = {}'.format(show(fpr)))
+    return pr, tpr, fpr
 
-def plot_roc(X_test, y_test, algo):
+def plot_roc(X_test, y_test, algo, segments = None, chunksize = 100_000, workers = None,
+             executor = 'thread', max_points = 1000):
     '''
     This function plots the ROC curve for an algorithm
     
+    algo can also be a list or dict of algorithms, and segments an array
+    of segment labels to draw one curve per segment. The test set is
+    scored in chunks, in a thread or process pool with workers, and every
+    curve is cut down to max_points points (see evaluate_models).
+    Returns the figure, a DataFrame of AUC and average precision per
+    model and segment, and the curves.
+    
     '''
-    probs = algo.predict_proba(X_test)
-    preds = probs[:,1]
-    fpr, tpr, threshold = roc_curve(y_test, preds)
-    roc_auc = auc(fpr, tpr)
+    import matplotlib.pyplot as plt
+    
+    summary, curves = evaluate_models(algo, X_test, y_test, segments = segments,
+                                      chunksize = chunksize, workers = workers,
+                                      executor = executor, max_points = max_points)
+    single = len(curves) == 1
 
+    fig = plt.gcf()
     plt.title('Receiver Operating Characteristic')
-    plt.plot(fpr, tpr, 'b', label = 'AUC = %0.4f' % roc_auc)
+    # the summary rows are in the order of the curves
+    for ((model, segment), curve), roc_auc in zip(curves.items(), summary['auc']):
+        if single:
+            plt.plot(curve['fpr'], curve['tpr'], 'b', label = 'AUC = %0.4f' % roc_auc)
+        else:
+            name = model if segment is None else '{} {}'.format(model, segment)
+            plt.plot(curve['fpr'], curve['tpr'], label = '%s AUC = %0.4f' % (name, roc_auc))
     plt.legend(loc = 'lower right')
     plt.plot([0, 1], [0, 1],'r--')
     plt.xlim([0, 1])
@@ -211,32 +365,40 @@ def plot_roc(X_test, y_test, algo):
     plt.ylabel('True Positive Rate')
     plt.xlabel('False Positive Rate')
     plt.show()
+    
+    return fig, summary, curves
 
-def plot_confusion(thresh, algo):
+def plot_confusion(thresh, algo, X_test, y_test):
     ''' 
-    This function plot the confusion matrix
+    This function plot the confusion matrix of an algorithm on the given
+    test data, predicting positive above the threshold
+    Use threshold_sweep to compare many thresholds at once.
     
     '''
     probs = algo.predict_proba(X_test)
-    y_pred = [1 if x > thresh else 0 for x in probs[:,1]]
-    cm = confusion_matrix(y_test, y_pred)
+    pos_label = algo.classes_[1] if hasattr(algo, 'classes_') else 1
+    row = threshold_sweep(y_test, probs[:,1], [thresh], pos_label = pos_label).iloc[0]
+    cm = np.array([[row['tn'], row['fp']], [row['fn'], row['tp']]], dtype = np.int64)
     plot_confusion_matrix(cm, ['0', '1'], )
     pr, tpr, fpr = show_data(cm, print_res = 1)
+    return pr, tpr, fpr
 
 
-def plot_importance(X, algo, num_feature_show):
+def plot_importance(X, algo, num_feature_show, y = None, method = 'auto', **kwargs):
     '''
     This function plot the feature importance for random forest algorithm
     
-    '''
-    import pandas as pd
+    Models without feature_importances_ (or method = 'permutation') use
+    permutation importance on X and y, which is computed in parallel and
+    cached per model and data (see feature_importance and
+    permutation_importance for the keyword arguments).
+    Returns the importance table.
     
-    impor = pd.DataFrame({
-        'feature': X.columns,
-        'importance': algo.feature_importances_
-    })
+    '''
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     
-    impor = impor.sort_values('importance', ascending = False)
+    impor = feature_importance(algo, X, y, method = method, **kwargs)
     
     fig, axes = plt.subplots(figsize = (15,8))
     sns.barplot(y = 'feature', x = 'importance', data = impor.iloc[:num_feature_show,:])
@@ -246,4 +408,6 @@ def plot_importance(X, algo, num_feature_show):
     
     sns.despine()
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    plt.show()
+    
+    return impor
\ No newline at end of file
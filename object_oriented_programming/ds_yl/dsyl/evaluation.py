@@ -0,0 +1,634 @@
+'''
+Evaluation engine behind the dsyl model plots
+
+threshold_sweep
+evaluate_models
+feature_importance
+confusion_metrics
+
+'''
+import hashlib
+import pickle
+import weakref
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+
+def _divide(a, b):
+    '''
+    This function divides arrays elementwise and returns 0 where b is 0
+
+    '''
+    a = np.asarray(a, dtype = float)
+    b = np.asarray(b, dtype = float)
+    out = np.zeros(np.broadcast(a, b).shape)
+    np.divide(a, b, out = out, where = b != 0)
+    return out
+
+
+def _counts(positive, ranked, thresholds = None):
+    '''
+    This function returns thresholds, tp, fp, fn and tn for labels and
+    scores already sorted by increasing score
+
+    '''
+    # positives among the i lowest scores
+    positives = np.concatenate([[0], np.cumsum(positive)])
+
+    if thresholds is None:
+        distinct = ranked[np.concatenate([[True], ranked[1:] != ranked[:-1]])] if len(ranked) else ranked
+        thresholds = np.concatenate([[-np.inf], distinct])
+    else:
+        thresholds = np.atleast_1d(np.asarray(thresholds, dtype = float))
+
+    below = np.searchsorted(ranked, thresholds, side = 'right')
+    fn = positives[below]
+    tn = below - fn
+    tp = positives[-1] - fn
+    fp = len(ranked) - below - tp
+    return thresholds, tp, fp, fn, tn
+
+
+def confusion_matrices(y_true, y_pred, groups = None, labels = None):
+    '''
+    This function counts the confusion matrices of many groups (e.g.
+    segments) with one bincount. Rows are true and columns predicted
+    labels, as in sklearn. Returns an array of shape (k, C, C) for k
+    groups, or (C, C) without groups, and the labels.
+
+    '''
+    y_true = np.asarray(y_true).ravel()
+    y_pred = np.asarray(y_pred).ravel()
+    if labels is None:
+        labels = np.union1d(y_true, y_pred)
+    labels = np.asarray(labels)
+    c = len(labels)
+
+    # codes in the order of labels, -1 for values that are not labels
+    index = pd.Index(labels)
+    true = index.get_indexer(y_true)
+    pred = index.get_indexer(y_pred)
+    known = (true >= 0) & (pred >= 0)
+
+    if groups is None:
+        codes, k = np.zeros(len(true), dtype = np.int64), 1
+    else:
+        codes, uniques = pd.factorize(np.asarray(groups).ravel())
+        known &= codes >= 0
+        k = len(uniques)
+
+    flat = (codes * c + true) * c + pred
+    counts = np.bincount(flat[known], minlength = k * c * c).reshape(k, c, c)
+    return (counts if groups is not None else counts[0]), labels
+
+
+def confusion_metrics(cm, average = None):
+    '''
+    This function computes precision, recall, fallout (fpr), f1 and the
+    Matthews correlation (mcc) of one or many confusion matrices at once,
+    with 0 where a ratio is undefined
+
+    cm has the shape (2, 2), (C, C), (k, 2, 2) or (k, C, C), rows true and
+    columns predicted labels. For 2 x 2 matrices the metrics are those of
+    class 1, as in show_data. For more classes they are computed one
+    class against the rest, with the shape (..., C), unless average is
+    'macro' (mean over classes) or 'micro' (from the counts summed over
+    classes). mcc is always one number per matrix (Gorodkin's multiclass
+    form for C > 2).
+
+    Returns a dict of arrays.
+
+    '''
+    cm = np.asarray(cm, dtype = float)
+    if cm.ndim not in (2, 3) or cm.shape[-1] != cm.shape[-2]:
+        raise ValueError('cm must have the shape (C, C) or (k, C, C)')
+    if average not in (None, 'macro', 'micro'):
+        raise ValueError("average must be None, 'macro' or 'micro'")
+
+    tp = np.diagonal(cm, axis1 = -2, axis2 = -1)
+    fp = cm.sum(axis = -2) - tp
+    fn = cm.sum(axis = -1) - tp
+    total = cm.sum(axis = (-2, -1))
+    tn = total[..., None] - tp - fp - fn
+
+    # Gorodkin: (c * s - sum p_k t_k) / sqrt((s^2 - sum p_k^2) (s^2 - sum t_k^2))
+    correct = tp.sum(axis = -1)
+    predicted = cm.sum(axis = -2)
+    actual = cm.sum(axis = -1)
+    mcc = _divide(correct * total - np.sum(predicted * actual, axis = -1),
+                  np.sqrt((total ** 2 - np.sum(predicted ** 2, axis = -1)) *
+                          (total ** 2 - np.sum(actual ** 2, axis = -1))))
+
+    if cm.shape[-1] == 2 and average is None:
+        tp, fp, fn, tn = tp[..., 1], fp[..., 1], fn[..., 1], tn[..., 1]
+    elif average == 'micro':
+        tp, fp, fn, tn = tp.sum(axis = -1), fp.sum(axis = -1), fn.sum(axis = -1), tn.sum(axis = -1)
+
+    precision = _divide(tp, tp + fp)
+    recall = _divide(tp, tp + fn)
+    metrics = {'precision': precision,
+               'recall': recall,
+               'fpr': _divide(fp, fp + tn),
+               'f1': _divide(2 * tp, 2 * tp + fp + fn)}
+
+    if average == 'macro':
+        metrics = {name: value.mean(axis = -1) for name, value in metrics.items()}
+    metrics['mcc'] = mcc
+    return metrics
+
+
+def threshold_sweep(y_true, scores, thresholds = None, pos_label = 1):
+    '''
+    This function computes the confusion matrix, precision, recall and
+    fallout for many thresholds at once. A score above the threshold is
+    predicted positive, as in plot_confusion.
+
+    The scores are sorted once and the positives counted with a cumulative
+    sum, so every threshold is a binary search instead of a pass over the
+    predictions. With thresholds = None every distinct score is a
+    threshold, after -inf (everything predicted positive).
+
+    Returns a DataFrame with the columns threshold, tp, fp, fn, tn,
+    precision, recall and fpr, one row per threshold.
+
+    '''
+    positive = (np.asarray(y_true) == pos_label).ravel()
+    scores = np.asarray(scores, dtype = float).ravel()
+    if len(positive) != len(scores):
+        raise ValueError('y_true and scores must have the same length')
+
+    order = np.argsort(scores, kind = 'stable')
+    thresholds, tp, fp, fn, tn = _counts(positive[order], scores[order], thresholds)
+
+    return pd.DataFrame({'threshold': thresholds, 'tp': tp, 'fp': fp, 'fn': fn, 'tn': tn,
+                         'precision': _divide(tp, tp + fp),
+                         'recall': _divide(tp, tp + fn),
+                         'fpr': _divide(fp, fp + tn)})
+
+
+def _rows(X, start, stop):
+    '''
+    This function returns rows start to stop of an array or DataFrame
+
+    '''
+    return X.iloc[start:stop] if hasattr(X, 'iloc') else X[start:stop]
+
+
+def _score(algo, X):
+    '''
+    This function returns the score of the positive class for rows of X
+
+    '''
+    if hasattr(algo, 'predict_proba'):
+        return algo.predict_proba(X)[:, 1]
+    return algo.decision_function(X)
+
+
+# state of the process pool workers, set once per worker
+_WORKER_STATE = None
+
+
+def _init_worker(state):
+
+    global _WORKER_STATE
+    _WORKER_STATE = state
+
+
+def _worker_score(X):
+
+    return _score(_WORKER_STATE['algo'], X)
+
+
+def predict_scores(algo, X, chunksize = 100_000, workers = None, executor = 'thread'):
+    '''
+    This function scores X with an algorithm in chunks of rows, so the
+    predict_proba output never holds more than a chunk. With workers, the
+    chunks are scored in a thread pool (estimators that release the GIL,
+    e.g. most sklearn predict code) or a process pool (executor =
+    'process', the model is pickled once per worker and the chunks once
+    each).
+
+    '''
+    n = len(X)
+    chunks = (_rows(X, start, start + chunksize) for start in range(0, n, chunksize))
+
+    if workers is None or workers == 1:
+        parts = [_score(algo, chunk) for chunk in chunks]
+    else:
+        if executor == 'thread':
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers = workers) as pool:
+                parts = list(pool.map(partial(_score, algo), chunks))
+        elif executor == 'process':
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker,
+                                     initargs = ({'algo': algo},)) as pool:
+                parts = list(pool.map(_worker_score, chunks))
+        else:
+            raise ValueError("executor must be 'thread' or 'process'")
+
+    if not parts:
+        return np.empty(0)
+    return np.concatenate([np.asarray(part, dtype = float) for part in parts])
+
+
+def _downsample(n, max_points):
+    '''
+    This function returns at most max_points indices spread over range(n),
+    keeping the first and the last
+
+    '''
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    return np.unique(np.round(np.linspace(0, n - 1, max_points)).astype(np.int64))
+
+
+def _curve(positive, ranked, max_points):
+    '''
+    This function returns the numbers and the downsampled ROC and
+    precision recall curve of labels and scores sorted by increasing score
+
+    '''
+    thresholds, tp, fp, fn, tn = _counts(positive, ranked)
+    tpr = _divide(tp, tp + fn)
+    fpr = _divide(fp, fp + tn)
+    precision = _divide(tp, tp + fp)
+
+    pos, neg = tp[0], fp[0]
+    if pos and neg:
+        # thresholds increase, so fpr and recall decrease
+        roc_auc = float(np.sum((fpr[:-1] - fpr[1:]) * (tpr[:-1] + tpr[1:]) / 2))
+        average_precision = float(np.sum((tpr[:-1] - tpr[1:]) * precision[:-1]))
+    else:
+        roc_auc = average_precision = np.nan
+
+    keep = _downsample(len(thresholds), max_points)
+    curve = pd.DataFrame({'threshold': thresholds[keep], 'fpr': fpr[keep], 'tpr': tpr[keep],
+                          'precision': precision[keep]})
+    numbers = {'n': len(ranked), 'positives': int(pos), 'auc': roc_auc,
+               'average_precision': average_precision}
+    return numbers, curve
+
+
+def _named(models):
+    '''
+    This function returns a dict of name: model for one model, a list or a
+    dict of models
+
+    '''
+    if isinstance(models, dict):
+        return dict(models)
+    if not isinstance(models, (list, tuple)):
+        models = [models]
+    names = [type(model).__name__ for model in models]
+    return {name if names.count(name) == 1 else '{} {}'.format(name, i): model
+            for i, (name, model) in enumerate(zip(names, models))}
+
+
+def curves_from_scores(y_true, scores, segments = None, pos_label = 1, max_points = 1000):
+    '''
+    This function computes ROC and precision recall curves, AUC and
+    average precision of many models, and of every segment, from their
+    scores
+
+    scores is a dict of name: scores or a 2d array with one column per
+    model. Every model is sorted once; the segments are then split off the
+    sorted order with a stable sort on the segment codes. Curves are cut
+    down to at most max_points points for plotting, the numbers use every
+    threshold.
+
+    Returns a DataFrame with model, segment (missing for all rows), n,
+    positives, auc and average_precision, and a dict of
+    (model, segment): curve DataFrame, with segment None for all rows.
+
+    '''
+    if not isinstance(scores, dict):
+        scores = np.asarray(scores, dtype = float)
+        scores = {i: column for i, column in enumerate(np.atleast_2d(scores.T))}
+
+    positive = (np.asarray(y_true) == pos_label).ravel()
+    if segments is not None:
+        codes, labels = pd.factorize(np.asarray(segments).ravel())
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0],
+                                                             minlength = len(labels)))])
+
+    rows = []
+    curves = {}
+    for name, values in scores.items():
+        values = np.asarray(values, dtype = float).ravel()
+        if len(values) != len(positive):
+            raise ValueError('scores of {} do not match y_true'.format(name))
+
+        order = np.argsort(values, kind = 'stable')
+        numbers, curves[(name, None)] = _curve(positive[order], values[order], max_points)
+        rows.append(dict(model = name, segment = None, **numbers))
+
+        if segments is None:
+            continue
+        order = order[codes[order] >= 0]
+        order = order[np.argsort(codes[order], kind = 'stable')]
+        for code, label in enumerate(labels.tolist()):
+            part = order[offsets[code]:offsets[code + 1]]
+            numbers, curves[(name, label)] = _curve(positive[part], values[part], max_points)
+            rows.append(dict(model = name, segment = label, **numbers))
+
+    summary = pd.DataFrame(rows, columns = ['model', 'segment', 'n', 'positives', 'auc',
+                                            'average_precision'])
+    return summary, curves
+
+
+def evaluate_models(models, X, y_true, segments = None, pos_label = 1, chunksize = 100_000,
+                    workers = None, executor = 'thread', max_points = 1000):
+    '''
+    This function scores X with one or many models in chunks (see
+    predict_scores) and returns their curves and numbers (see
+    curves_from_scores)
+
+    '''
+    scores = {name: predict_scores(model, X, chunksize, workers, executor)
+              for name, model in _named(models).items()}
+    return curves_from_scores(y_true, scores, segments, pos_label, max_points)
+
+
+def _accuracy(y_true, output, pos_label):
+
+    return float(np.mean(np.asarray(y_true) == output))
+
+
+def _r2(y_true, output, pos_label):
+
+    y_true = np.asarray(y_true, dtype = float)
+    total = np.sum((y_true - y_true.mean()) ** 2)
+    return float(1 - np.sum((y_true - output) ** 2) / total) if total else np.nan
+
+
+def _roc_auc(y_true, output, pos_label):
+
+    positive = (np.asarray(y_true) == pos_label).ravel()
+    order = np.argsort(output, kind = 'stable')
+    return _curve(positive[order], output[order], 2)[0]['auc']
+
+
+def _custom_metric(scoring, y_true, output, pos_label):
+
+    return scoring(y_true, output)
+
+
+# name: (method giving the model output, metric of y_true and output)
+SCORERS = {'accuracy': ('predict', _accuracy),
+           'r2': ('predict', _r2),
+           'roc_auc': ('score', _roc_auc)}
+
+# permutation importances by model, data and settings, least recently used first
+_IMPORTANCE_CACHE = OrderedDict()
+
+# permutation importances kept by the cache
+IMPORTANCE_CACHE_SIZE = 8
+
+# fingerprint of a model with the (nested) attribute values it was computed from
+_MODEL_FINGERPRINTS = weakref.WeakKeyDictionary()
+
+
+def fingerprint(obj):
+    '''
+    This function returns a hash of a model, an array or a DataFrame, used
+    to recognize the same model and data between calls
+
+    '''
+    digest = hashlib.sha1()
+    if isinstance(obj, pd.DataFrame):
+        digest.update(repr(list(obj.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index = False).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        digest.update(pd.util.hash_pandas_object(obj, index = False).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray) and obj.dtype != object:
+        digest.update(repr((obj.dtype.str, obj.shape)).encode())
+        digest.update(np.ascontiguousarray(obj).view(np.uint8).ravel().data)
+    else:
+        digest.update(pickle.dumps(obj, protocol = 4))
+    return digest.hexdigest()
+
+
+def _attribute_values(algo):
+    '''
+    This function returns the attributes of a model and, walking down, of
+    the estimators, lists, tuples and dicts it holds (e.g. pipeline steps,
+    the fitted trees of a forest), as (owner id, name, value) in a fixed
+    order
+
+    '''
+    items = []
+    stack = [algo]
+    seen = set()
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, dict):
+            pairs = list(obj.items())
+        elif isinstance(obj, (list, tuple)):
+            pairs = list(enumerate(obj))
+        else:
+            try:
+                pairs = list(vars(obj).items())
+            except TypeError:
+                continue
+
+        for name, value in pairs:
+            items.append((id(obj), name, value))
+            if isinstance(value, (dict, list, tuple)) or hasattr(value, 'get_params'):
+                stack.append(value)
+    return items
+
+
+def _model_fingerprint(algo):
+    '''
+    This function returns the fingerprint of a model, pickling it again
+    only when an attribute of the model or of an estimator nested in it
+    was replaced since the last call (as fit and set_params do)
+
+    '''
+    try:
+        vars(algo)
+        known = _MODEL_FINGERPRINTS.get(algo)
+    except TypeError:
+        return fingerprint(algo)
+
+    items = _attribute_values(algo)
+    if (known is None or len(known[0]) != len(items) or
+            any(old[:2] != new[:2] or old[2] is not new[2] for old, new in zip(known[0], items))):
+        known = (items, fingerprint(algo))
+        _MODEL_FINGERPRINTS[algo] = known
+    return known[1]
+
+
+def clear_importance_cache():
+    '''
+    This function empties the cache of permutation_importance
+
+    '''
+    _IMPORTANCE_CACHE.clear()
+    _MODEL_FINGERPRINTS.clear()
+
+
+def _feature_names(X):
+
+    if hasattr(X, 'columns'):
+        return [str(name) for name in X.columns]
+    return ['x{}'.format(j) for j in range(np.shape(X)[1])]
+
+
+def _output(algo, X, method):
+    '''
+    This function returns the predictions or the positive class scores
+
+    '''
+    return _score(algo, X) if method == 'score' else np.asarray(algo.predict(X))
+
+
+def _permuted_score(state, feature, seed):
+    '''
+    This function scores the model with one feature shuffled. Only one
+    chunk of rows is copied at a time, so memory is bounded by the chunk
+    size and not by the size of X.
+
+    '''
+    X, chunksize = state['X'], state['chunksize']
+    n = len(X)
+    order = np.random.default_rng(seed).permutation(n)
+    if hasattr(X, 'iloc'):
+        shuffled = X.iloc[:, feature].to_numpy()[order]
+    else:
+        shuffled = np.asarray(X)[:, feature][order]
+
+    parts = []
+    for start in range(0, n, chunksize):
+        chunk = _rows(X, start, start + chunksize).copy()
+        if hasattr(chunk, 'iloc'):
+            chunk[chunk.columns[feature]] = shuffled[start:start + chunksize]
+        else:
+            chunk[:, feature] = shuffled[start:start + chunksize]
+        parts.append(_output(state['algo'], chunk, state['method']))
+
+    output = np.concatenate(parts) if parts else np.empty(0)
+    return state['metric'](state['y'], output, state['pos_label'])
+
+
+def _worker_permuted_score(feature, seed):
+
+    return _permuted_score(_WORKER_STATE, feature, seed)
+
+
+def permutation_importance(algo, X, y, scoring = None, n_repeats = 5, random_state = 0,
+                           chunksize = 100_000, workers = None, executor = 'thread',
+                           cache = True):
+    '''
+    This function measures the importance of every feature of X as the
+    drop of the model score when the feature is shuffled, for any model
+
+    All (feature, repeat) pairs are independent tasks, run in a thread or
+    process pool with workers (in a process pool the model and the data
+    are sent once per worker). Every task predicts in chunks of rows.
+    Each pair has its own random stream, so results do not depend on the
+    pool. scoring is 'accuracy' (default for classifiers), 'r2' (default
+    otherwise), 'roc_auc' or a function of y_true and predictions.
+
+    Results are cached by model and data fingerprint and the settings, so
+    plotting the same model again does not recompute them. The cache keeps
+    the IMPORTANCE_CACHE_SIZE most recently used results and is emptied
+    by clear_importance_cache.
+
+    Returns a DataFrame with feature, importance (mean drop) and std,
+    sorted by importance.
+
+    '''
+    if scoring is None:
+        scoring = 'accuracy' if hasattr(algo, 'classes_') else 'r2'
+    if callable(scoring):
+        method, metric = 'predict', partial(_custom_metric, scoring)
+    elif scoring in SCORERS:
+        method, metric = SCORERS[scoring]
+    else:
+        raise ValueError('scoring must be one of {} or a function'.format(', '.join(SCORERS)))
+
+    key = None
+    if cache:
+        key = (_model_fingerprint(algo), fingerprint(X), fingerprint(np.asarray(y)),
+               scoring if isinstance(scoring, str) else fingerprint(scoring),
+               n_repeats, random_state)
+        if key in _IMPORTANCE_CACHE:
+            _IMPORTANCE_CACHE.move_to_end(key)
+            return _IMPORTANCE_CACHE[key].copy()
+
+    pos_label = algo.classes_[1] if hasattr(algo, 'classes_') and len(algo.classes_) > 1 else 1
+    state = {'algo': algo, 'X': X, 'y': np.asarray(y), 'chunksize': chunksize,
+             'method': method, 'metric': metric, 'pos_label': pos_label}
+
+    baseline = metric(state['y'], np.concatenate(
+        [_output(algo, _rows(X, start, start + chunksize), method)
+         for start in range(0, len(X), chunksize)]), pos_label)
+
+    features = _feature_names(X)
+    seeds = np.random.SeedSequence(random_state).spawn(len(features) * n_repeats)
+    tasks = [(feature, seeds[feature * n_repeats + repeat])
+             for feature in range(len(features)) for repeat in range(n_repeats)]
+
+    if workers is None or workers == 1:
+        scores = [_permuted_score(state, feature, seed) for feature, seed in tasks]
+    elif executor == 'thread':
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers = workers) as pool:
+            scores = list(pool.map(lambda task: _permuted_score(state, *task), tasks))
+    elif executor == 'process':
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker,
+                                 initargs = (state,)) as pool:
+            scores = list(pool.map(_worker_permuted_score, *zip(*tasks)))
+    else:
+        raise ValueError("executor must be 'thread' or 'process'")
+
+    drops = baseline - np.asarray(scores, dtype = float).reshape(len(features), n_repeats)
+    result = pd.DataFrame({'feature': features, 'importance': drops.mean(axis = 1),
+                           'std': drops.std(axis = 1)})
+    result = result.sort_values('importance', ascending = False, kind = 'stable').reset_index(drop = True)
+
+    if cache:
+        _IMPORTANCE_CACHE[key] = result
+        while len(_IMPORTANCE_CACHE) > IMPORTANCE_CACHE_SIZE:
+            _IMPORTANCE_CACHE.popitem(last = False)
+    return result.copy()
+
+
+def feature_importance(algo, X, y = None, method = 'auto', **kwargs):
+    '''
+    This function returns the feature importance of a model as a DataFrame
+    with feature and importance, sorted by importance
+
+    method = 'builtin' reads feature_importances_ (e.g. random forests),
+    'permutation' calls permutation_importance with y and kwargs, and
+    'auto' uses the builtin importance when the model has one.
+
+    '''
+    if method == 'auto':
+        method = 'builtin' if hasattr(algo, 'feature_importances_') else 'permutation'
+
+    if method == 'builtin':
+        result = pd.DataFrame({'feature': _feature_names(X),
+                               'importance': algo.feature_importances_})
+        return result.sort_values('importance', ascending = False,
+                                  kind = 'stable').reset_index(drop = True)
+    if method == 'permutation':
+        if y is None:
+            raise ValueError('permutation importance needs y')
+        return permutation_importance(algo, X, y, **kwargs)
+
+    raise ValueError("method must be 'auto', 'builtin' or 'permutation'")
@@ -0,0 +1,303 @@
+'''
+Modeling harness: parallel cross validation and parameter search
+
+fold_splits
+clear_split_cache
+cross_validate
+grid_search
+
+'''
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .evaluation import SCORERS, fingerprint, _custom_metric, _output
+
+# fold of every row by labels and split settings, least recently used first
+_SPLIT_CACHE = OrderedDict()
+
+# fold assignments kept by the cache, each holds one int16 per row
+SPLIT_CACHE_SIZE = 4
+
+# data of the last folds a process prepared, by run and fold
+_FOLD_CACHE = {}
+
+# folds kept per process, each holds a copy of its train rows (and of the
+# test rows, when preprocessed)
+FOLD_CACHE_SIZE = 1
+
+# state of the process pool workers, set once per worker
+_WORKER_STATE = None
+
+
+def fold_splits(y, n_splits = 5, stratify = True, shuffle = True, random_state = 0):
+    '''
+    This function returns the test fold of every row, from StratifiedKFold
+    (or KFold without stratify). The assignment is cached by the labels
+    and the settings, so every candidate and every call with the same y
+    uses the same folds without splitting again. The cache keeps the
+    SPLIT_CACHE_SIZE most recently used assignments and is emptied by
+    clear_split_cache.
+
+    '''
+    y = np.asarray(y)
+    key = (fingerprint(y), n_splits, stratify, shuffle, random_state if shuffle else None)
+    if key in _SPLIT_CACHE:
+        _SPLIT_CACHE.move_to_end(key)
+    else:
+        from sklearn.model_selection import KFold, StratifiedKFold
+
+        splitter = (StratifiedKFold if stratify else KFold)(
+            n_splits, shuffle = shuffle, random_state = random_state if shuffle else None)
+        folds = np.empty(len(y), dtype = np.int16)
+        for fold, (_, test) in enumerate(splitter.split(np.zeros((len(y), 1)), y if stratify else None)):
+            folds[test] = fold
+        _SPLIT_CACHE[key] = folds
+        while len(_SPLIT_CACHE) > SPLIT_CACHE_SIZE:
+            _SPLIT_CACHE.popitem(last = False)
+    return _SPLIT_CACHE[key]
+
+
+def clear_split_cache():
+    '''
+    This function empties the cache of fold_splits
+
+    '''
+    _SPLIT_CACHE.clear()
+
+
+def _fold_data(state, fold):
+    '''
+    This function returns the train and test rows of a fold, passed
+    through a freshly fitted copy of the preprocessing. The result is
+    kept for the next candidates of the same fold in this process.
+
+    '''
+    key = (state['run'], fold)
+    if key in _FOLD_CACHE:
+        return _FOLD_CACHE[key], 0.0
+
+    start = time.perf_counter()
+    X, y = state['X'], state['y']
+    if 'bounds' in state:
+        # rows are ordered by fold: the test rows are a view of the shared
+        # arrays and the train rows are copied from two contiguous slices
+        first, last = state['bounds'][fold], state['bounds'][fold + 1]
+        X_train = np.concatenate([X[:first], X[last:]])
+        y_train = np.concatenate([y[:first], y[last:]])
+        X_test, y_test = X[first:last], y[first:last]
+    else:
+        test = state['folds'] == fold
+        X_train, y_train = X[~test], y[~test]
+        X_test, y_test = X[test], y[test]
+
+    if state['preprocess'] is not None:
+        from sklearn.base import clone
+
+        preprocess = clone(state['preprocess']).fit(X_train, y_train)
+        X_train, X_test = preprocess.transform(X_train), preprocess.transform(X_test)
+
+    data = (X_train, y_train, X_test, y_test)
+    while len(_FOLD_CACHE) >= FOLD_CACHE_SIZE:
+        _FOLD_CACHE.pop(next(iter(_FOLD_CACHE)))
+    _FOLD_CACHE[key] = data
+    return data, time.perf_counter() - start
+
+
+def _run_task(state, fold, candidates):
+    '''
+    This function fits and scores a batch of candidates on one fold and
+    returns one timed result row per candidate
+
+    '''
+    from sklearn.base import clone
+
+    (X_train, y_train, X_test, y_test), preprocess_seconds = _fold_data(state, fold)
+
+    rows = []
+    for index, params in candidates:
+        model = clone(state['estimator']).set_params(**params)
+
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fitted = time.perf_counter()
+        pos_label = model.classes_[1] if hasattr(model, 'classes_') and len(model.classes_) > 1 else 1
+        score = state['metric'](y_test, _output(model, X_test, state['method']), pos_label)
+        scored = time.perf_counter()
+
+        rows.append({'candidate': index, 'fold': fold, 'score': score,
+                     'fit_seconds': fitted - start, 'score_seconds': scored - fitted,
+                     'preprocess_seconds': preprocess_seconds})
+        # only the first candidate of a batch pays for the preprocessing
+        preprocess_seconds = 0.0
+    return rows
+
+
+def _init_worker(state):
+    '''
+    This function memory-maps the shared arrays once per worker
+
+    '''
+    global _WORKER_STATE
+    state = dict(state)
+    for name in ('X', 'y'):
+        if name + '_path' in state:
+            state[name] = np.load(state.pop(name + '_path'), mmap_mode = 'r')
+    _WORKER_STATE = state
+
+
+def _worker_task(fold, candidates):
+
+    return _run_task(_WORKER_STATE, fold, candidates)
+
+
+def _search(estimator, candidates, X, y, scoring = None, n_splits = 5, stratify = None,
+            shuffle = True, random_state = 0, preprocess = None, workers = None,
+            shared_dir = None):
+    '''
+    This function runs every candidate on every fold and returns the
+    result rows as a DataFrame (see grid_search)
+
+    '''
+    from sklearn.base import is_classifier
+
+    if scoring is None:
+        scoring = 'accuracy' if is_classifier(estimator) else 'r2'
+    if callable(scoring):
+        method, metric = 'predict', partial(_custom_metric, scoring)
+    elif scoring in SCORERS:
+        method, metric = SCORERS[scoring]
+    else:
+        raise ValueError('scoring must be one of {} or a function'.format(', '.join(SCORERS)))
+
+    if stratify is None:
+        stratify = is_classifier(estimator)
+
+    X = X.to_numpy() if hasattr(X, 'to_numpy') else np.asarray(X)
+    y = y.to_numpy() if hasattr(y, 'to_numpy') else np.asarray(y)
+    if X.dtype == object:
+        raise ValueError('the features must be numeric to be shared between processes')
+
+    folds = fold_splits(y, n_splits, stratify, shuffle, random_state)
+    state = {'estimator': estimator, 'preprocess': preprocess, 'method': method,
+             'metric': metric, 'run': os.urandom(8).hex()}
+
+    workers = os.cpu_count() if workers is None else workers
+
+    # split the candidates of every fold so that all workers get tasks
+    batches = min(len(candidates), max(1, -(-workers // n_splits)))
+    size = -(-len(candidates) // batches)
+    indexed = list(enumerate(candidates))
+    tasks = [(fold, indexed[start:start + size])
+             for fold in range(n_splits) for start in range(0, len(indexed), size)]
+
+    if workers <= 1:
+        state.update(X = X, y = y, folds = folds)
+        try:
+            rows = [row for fold, batch in tasks for row in _run_task(state, fold, batch)]
+        finally:
+            _FOLD_CACHE.clear()
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        if shared_dir is None and os.path.isdir('/dev/shm'):
+            shared_dir = '/dev/shm'
+        # the rows are written once, ordered by fold, and memory-mapped by
+        # every worker; labels of object dtype cannot be mapped and are sent
+        order = np.argsort(folds, kind = 'stable')
+        bounds = np.searchsorted(folds[order], np.arange(n_splits + 1))
+        state['bounds'] = bounds
+        if y.dtype == object:
+            state['y'] = y[order]
+
+        with tempfile.TemporaryDirectory(prefix = 'dsyl-', dir = shared_dir) as directory:
+            for name, value in (('X', X), ('y', y)):
+                if name in state:
+                    continue
+                path = os.path.join(directory, name + '.npy')
+                shared = np.lib.format.open_memmap(path, mode = 'w+', dtype = value.dtype,
+                                                   shape = value.shape)
+                # one fold at a time, so the reordering never copies all of X
+                for fold in range(n_splits):
+                    shared[bounds[fold]:bounds[fold + 1]] = value[order[bounds[fold]:bounds[fold + 1]]]
+                shared.flush()
+                del shared
+                state[name + '_path'] = path
+
+            with ProcessPoolExecutor(max_workers = workers, initializer = _init_worker,
+                                     initargs = (state,)) as pool:
+                jobs = [pool.submit(_worker_task, fold, batch) for fold, batch in tasks]
+                rows = [row for job in jobs for row in job.result()]
+
+    return pd.DataFrame(rows).sort_values(['candidate', 'fold']).reset_index(drop = True)
+
+
+def cross_validate(estimator, X, y, scoring = None, n_splits = 5, stratify = None, shuffle = True,
+                   random_state = 0, preprocess = None, workers = None, shared_dir = None):
+    '''
+    This function cross validates an estimator, one fold per task of a
+    process pool (see grid_search)
+
+    Returns a DataFrame with fold, score, fit_seconds, score_seconds and
+    preprocess_seconds per fold.
+
+    '''
+    folds = _search(estimator, [{}], X, y, scoring, n_splits, stratify, shuffle, random_state,
+                    preprocess, workers, shared_dir)
+    return folds.drop(columns = 'candidate')
+
+
+def grid_search(estimator, param_grid, X, y, scoring = None, n_splits = 5, stratify = None,
+                shuffle = True, random_state = 0, preprocess = None, workers = None,
+                shared_dir = None):
+    '''
+    This function scores every parameter combination of param_grid (as in
+    GridSearchCV) with cross validation in a process pool
+
+    The folds are stratified for classifiers and plain KFold otherwise,
+    as in sklearn, unless stratify is True or False.
+
+    X and y are written once, ordered by fold, to .npy files in shared
+    memory (/dev/shm when available, or shared_dir) and memory-mapped
+    read-only by the workers, so the input is not pickled into every
+    worker. The test rows of a fold are a view of that map, but fitting
+    needs the train rows (about (k - 1) / k of X) in one array: a worker
+    copies them, and preprocesses them, once per fold it works on and
+    keeps at most FOLD_CACHE_SIZE folds. The folds are computed once
+    (fold_splits). Tasks are (fold, batch of candidates): a worker fits
+    the preprocessing (an unfitted sklearn transformer, e.g.
+    StandardScaler()) once per fold and reuses the transformed rows for
+    all candidates of the batch and of later batches of that fold.
+    scoring is 'accuracy' (default for classifiers), 'r2' (default
+    otherwise), 'roc_auc' or a function of y_true and predictions.
+    workers = 1 runs in this process.
+
+    Returns a DataFrame per candidate (params, mean_score, std_score,
+    mean_fit_seconds, total_seconds, rank), best first, and a DataFrame
+    of every fold of every candidate with its timing.
+
+    '''
+    from sklearn.model_selection import ParameterGrid
+
+    candidates = list(ParameterGrid(param_grid))
+    folds = _search(estimator, candidates, X, y, scoring, n_splits, stratify, shuffle,
+                    random_state, preprocess, workers, shared_dir)
+
+    folds['total_seconds'] = folds[['fit_seconds', 'score_seconds', 'preprocess_seconds']].sum(axis = 1)
+    grouped = folds.groupby('candidate')
+    summary = pd.DataFrame({'params': candidates,
+                            'mean_score': grouped['score'].mean(),
+                            'std_score': grouped['score'].std(ddof = 0),
+                            'mean_fit_seconds': grouped['fit_seconds'].mean(),
+                            'total_seconds': grouped['total_seconds'].sum()})
+    # candidates without a score (e.g. roc_auc on a fold of one class) rank last
+    summary['rank'] = summary['mean_score'].rank(ascending = False, method = 'min',
+                                                 na_option = 'bottom').astype(int)
+    summary = summary.sort_values('rank', kind = 'stable')
+
+    return summary, folds.drop(columns = 'total_seconds')
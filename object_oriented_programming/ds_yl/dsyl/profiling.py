@@ -0,0 +1,1001 @@
+'''
+Profiling engine behind the dsyl plots
+
+missing_counts
+correlation
+top_correlations
+category_counts
+class_distribution
+profile
+
+'''
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# cells processed at a time when a frame is walked in row blocks
+BLOCK_CELLS = 10_000_000
+
+# quantiles drawn by box plots: whisker ends, quartiles and median
+BOX_QUANTILES = [0, 0.25, 0.5, 0.75, 1]
+
+
+def _row_blocks(df, block_rows = None):
+    '''
+    This function walks over a DataFrame in blocks of rows so that
+    temporary frames stay at about BLOCK_CELLS cells
+
+    '''
+    if block_rows is None:
+        block_rows = max(1, BLOCK_CELLS // max(1, df.shape[1]))
+    for start in range(0, len(df), block_rows):
+        yield df.iloc[start:start + block_rows]
+
+
+def missing_counts(df, block_rows = None):
+    '''
+    This function counts the missing values of every column in one pass
+    over row blocks and returns them as a Series
+
+    '''
+    counts = pd.Series(0, index = df.columns, dtype = 'int64')
+    for block in _row_blocks(df, block_rows):
+        counts += block.isna().sum()
+    return counts
+
+
+def sample_size_for_error(error = 0.01, confidence = 0.95, pairs = 1, present = 1.0):
+    '''
+    This function returns the number of rows needed so that `pairs`
+    correlations estimated on a random sample are all within `error` of
+    the full data with the given confidence. It uses the Fisher z
+    standard error 1 / sqrt(m - 3), which bounds the error of r for every
+    r (normal approximation), with the Sidak adjusted confidence
+    confidence ** (1 / pairs) per coefficient. present is (a lower bound
+    of) the smallest fraction of rows where both columns of a pair are not
+    missing, as only those m rows estimate the coefficient.
+
+    '''
+    if present <= 0:
+        return np.inf
+    z = _sidak_z(confidence, pairs)
+    return int(np.ceil(((z / error) ** 2 + 3) / present))
+
+
+def _sidak_z(confidence, pairs):
+    '''
+    This function returns the normal quantile that holds for `pairs`
+    estimates at once with the given confidence (Sidak)
+
+    '''
+    return NormalDist().inv_cdf(0.5 + confidence ** (1 / max(1, pairs)) / 2)
+
+
+def _correlation_error(sample, r, z):
+    '''
+    This function returns the largest half width z * se(r) over the pairs
+    of a correlation matrix r estimated on a sample. se(r) is the delta
+    method standard error from the fourth moments of the sample, which,
+    unlike the Fisher z bound, also holds for skewed or heavy tailed
+    columns (for normal columns it is (1 - r^2) / sqrt(m)).
+
+    '''
+    present = ~np.isnan(sample)
+    m = present.astype(float)
+    mean = _column_means(sample)
+    sd = np.sqrt((np.where(present, sample - mean, 0.0) ** 2).sum(axis = 0) /
+                 np.maximum(m.sum(axis = 0), 1))
+    u = np.where(present, (sample - mean) / np.where(sd > 0, sd, 1), 0.0)
+
+    n = m.T @ m
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        m22 = (u ** 2).T @ (u ** 2) / n
+        m31 = (u ** 3).T @ u / n
+        m40 = (u ** 4).T @ m / n
+        var = (r ** 2 / 4 * (m40 + m40.T + 2 * m22) - r * (m31 + m31.T) + m22) / n
+    i, j = np.triu_indices_from(r, k = 1)
+    half = z * np.sqrt(np.maximum(var[i, j], 0))
+    half = half[~np.isnan(half)]
+    return float(half.max()) if len(half) else 0.0
+
+
+class ReservoirSample:
+    '''
+    Uniform random sample of fixed size over a stream of row blocks
+    (Algorithm R, vectorized per block)
+
+    '''
+
+    def __init__(self, size, random_state = None):
+        self.size = size
+        self.rng = np.random.default_rng(random_state)
+        self.rows = None
+        self.seen = 0
+
+    def update(self, block):
+        '''
+        This function offers the rows of a 2d array to the sample
+
+        '''
+        block = np.asarray(block, dtype = float)
+        if self.rows is None:
+            self.rows = np.empty((self.size, block.shape[1]))
+
+        # the first rows fill the reservoir
+        fill = min(max(self.size - self.seen, 0), len(block))
+        self.rows[self.seen:self.seen + fill] = block[:fill]
+
+        rest = block[fill:]
+        if len(rest):
+            index = self.seen + fill + np.arange(len(rest))
+            slot = self.rng.integers(0, index + 1)
+            accept = np.flatnonzero(slot < self.size)
+            # a later row replaces an earlier one in the same slot, keep the last
+            last = accept[::-1][np.unique(slot[accept][::-1], return_index = True)[1]]
+            self.rows[slot[last]] = rest[last]
+
+        self.seen += len(block)
+
+    def sample(self):
+        '''
+        This function returns the sampled rows
+
+        '''
+        if self.rows is None:
+            return np.empty((0, 0))
+        return self.rows[:min(self.seen, self.size)]
+
+
+class CorrelationAccumulator:
+    '''
+    Mergeable sums for a Pearson correlation matrix with pairwise complete
+    observations, the same definition as DataFrame.corr(). Row blocks are
+    folded in with a few matrix products, and accumulators over different
+    blocks of the same columns add up. Values are shifted by `shift`
+    (e.g. rough column means) before summing to keep the sums well
+    conditioned; accumulators can only be merged with the same shift.
+
+    '''
+
+    def __init__(self, columns, shift = None):
+        p = len(columns)
+        self.columns = list(columns)
+        self.shift = np.zeros(p) if shift is None else np.asarray(shift, dtype = float)
+        self.n = np.zeros((p, p))
+        self.sx = np.zeros((p, p))
+        self.sxx = np.zeros((p, p))
+        self.sxy = np.zeros((p, p))
+
+    def update(self, block):
+        '''
+        This function folds a 2d array of rows into the sums
+
+        '''
+        x = np.asarray(block, dtype = float) - self.shift
+        present = ~np.isnan(x)
+        x = np.where(present, x, 0.0)
+        m = present.astype(float)
+
+        self.n += m.T @ m
+        # sx[i, j] is the sum of column i over the rows where j is present
+        self.sx += x.T @ m
+        self.sxx += (x * x).T @ m
+        self.sxy += x.T @ x
+
+    def merge(self, other):
+        '''
+        This function adds the sums of another accumulator over the same
+        columns, moving them to this shift first
+
+        '''
+        d = other.shift - self.shift
+        n, sx = other.n, other.sx
+        self.n += n
+        self.sx += sx + d[:, None] * n
+        self.sxx += other.sxx + 2 * d[:, None] * sx + d[:, None] ** 2 * n
+        self.sxy += other.sxy + sx * d[None, :] + sx.T * d[:, None] + np.outer(d, d) * n
+        return self
+
+    def corr(self):
+        '''
+        This function returns the correlation matrix as a DataFrame
+
+        '''
+        n = self.n
+        cov = n * self.sxy - self.sx * self.sx.T
+        var_x = n * self.sxx - self.sx ** 2
+        var_y = var_x.T
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            r = cov / np.sqrt(var_x * var_y)
+        r[n < 2] = np.nan
+        r = np.clip(r, -1, 1)
+        return pd.DataFrame(r, index = self.columns, columns = self.columns)
+
+
+def _column_means(block):
+    '''
+    This function returns the column means of a 2d array ignoring missing
+    values, 0 for columns without values
+
+    '''
+    present = ~np.isnan(block)
+    count = present.sum(axis = 0)
+    total = np.where(present, block, 0.0).sum(axis = 0)
+    return np.where(count > 0, total / np.maximum(count, 1), 0.0)
+
+
+def correlation(df, method = 'auto', error = 0.01, confidence = 0.95,
+                block_rows = None, random_state = None):
+    '''
+    This function computes the correlation matrix of the numeric columns
+
+    method = 'exact' accumulates all rows blockwise.
+    method = 'sample' uses a reservoir sample of rows large enough that
+    all coefficients are within `error` of the exact ones at once with the
+    given confidence (see sample_size_for_error), counting only the rows
+    where both columns of a pair can be present (bounded from the missing
+    counts of the two sparsest columns). That size assumes
+    normal columns, so the error is then estimated from the sample itself
+    and the sample is drawn once more, larger, when it is over `error`
+    (e.g. for skewed columns). method = 'auto' samples only when that is
+    fewer rows.
+
+    The bound achieved (0 when exact) is in the attrs['error'] of the
+    returned matrix.
+
+    '''
+    numeric = df.select_dtypes('number')
+    if method not in ('auto', 'exact', 'sample'):
+        raise ValueError("method must be 'auto', 'exact' or 'sample'")
+
+    if method != 'exact':
+        p = numeric.shape[1]
+        z = _sidak_z(confidence, p * (p - 1) // 2)
+        # both columns of a pair are present in at least 1 - f_i - f_j of the
+        # rows, for f the missing fractions: one O(n p) pass, not O(n p^2)
+        missing = np.sort(missing_counts(numeric, block_rows).to_numpy() / max(len(numeric), 1))
+        present = 1 - missing[-2:].sum() if p > 1 else 1.0
+        size = sample_size_for_error(error, confidence, p * (p - 1) // 2, present)
+        method = 'exact' if size >= len(numeric) else 'sample'
+
+    if method == 'sample':
+        rng = np.random.default_rng(random_state)
+        for attempt in range(2):
+            reservoir = ReservoirSample(size, rng)
+            for block in _row_blocks(numeric, block_rows):
+                reservoir.update(block.to_numpy(dtype = float))
+            sample = reservoir.sample()
+
+            acc = CorrelationAccumulator(numeric.columns, _column_means(sample))
+            acc.update(sample)
+            corr = acc.corr()
+            bound = _correlation_error(sample, corr.to_numpy(), z)
+            if bound <= error or attempt:
+                corr.attrs['error'] = bound
+                return corr
+
+            # the error shrinks with the square root of the sample size
+            size = int(np.ceil(size * (bound / error) ** 2 * 1.1))
+            if size >= len(numeric):
+                break
+
+    acc = None
+    for block in _row_blocks(numeric, block_rows):
+        block = block.to_numpy(dtype = float)
+        if acc is None:
+            acc = CorrelationAccumulator(numeric.columns, _column_means(block))
+        acc.update(block)
+
+    if acc is None:
+        acc = CorrelationAccumulator(numeric.columns)
+    corr = acc.corr()
+    corr.attrs['error'] = 0.0
+    return corr
+
+
+def top_correlations(corr, k = 10):
+    '''
+    This function returns the k most correlated pairs of variables by
+    absolute correlation as a DataFrame
+
+    '''
+    values = corr.to_numpy()
+    i, j = np.triu_indices_from(values, k = 1)
+    r = values[i, j]
+    keep = ~np.isnan(r)
+    i, j, r = i[keep], j[keep], r[keep]
+    order = np.argsort(-np.abs(r), kind = 'stable')[:k]
+    return pd.DataFrame({'var1': corr.index[i[order]], 'var2': corr.columns[j[order]],
+                         'corr': r[order]}).reset_index(drop = True)
+
+
+def category_counts(df, col, hue = None):
+    '''
+    This function counts the rows of every value of col, and of hue if
+    given, with one groupby. Returns a DataFrame with the columns col, hue
+    (if given) and count, sorted by value.
+
+    '''
+    keys = [col] if hue is None else [col, hue]
+    counts = df.groupby(keys, observed = True).size()
+    return counts.reset_index(name = 'count')
+
+
+def top_categories(counts, col, k, other = 'other'):
+    '''
+    This function keeps the k values of col with the most rows in the
+    output of category_counts and folds the others into one value named
+    other. Values are turned into strings and ordered by count, with other
+    last.
+
+    '''
+    totals = counts.groupby(col, sort = False)['count'].sum().sort_values(ascending = False,
+                                                                          kind = 'stable')
+    keep = totals.index[:k]
+    rank = pd.Series(np.arange(len(keep)), index = keep)
+
+    values = counts[col]
+    folded = counts.assign(**{col: np.where(values.isin(keep), values.astype(str), other),
+                              '_rank': values.map(rank).fillna(len(keep)).to_numpy()})
+    keys = ['_rank', col] + list(counts.columns[1:-1])
+    folded = folded.groupby(keys, sort = True)['count'].sum().reset_index()
+    return folded.drop(columns = '_rank')
+
+
+def class_distribution(df, col, target, bins = 50):
+    '''
+    This function aggregates a numeric column by target class in two
+    passes over the column: a histogram per class with one bincount, and
+    the box plot quantiles per class with one groupby.
+
+    Returns the bin edges, a DataFrame of counts with one column per class
+    and a DataFrame of the BOX_QUANTILES with one row per class.
+
+    '''
+    values = df[col].to_numpy(dtype = float, na_value = np.nan)
+    codes, classes = pd.factorize(df[target], sort = True)
+    keep = np.isfinite(values) & (codes >= 0)
+    values, codes = values[keep], codes[keep]
+
+    low, high = (values.min(), values.max()) if len(values) else (0.0, 1.0)
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    edges = np.linspace(low, high, bins + 1)
+
+    index = np.clip(((values - low) / (high - low) * bins).astype(np.int64), 0, bins - 1)
+    counts = np.bincount(codes * bins + index, minlength = len(classes) * bins)
+    counts = pd.DataFrame(counts.reshape(len(classes), bins).T.astype(float), columns = classes)
+
+    quantiles = pd.Series(values).groupby(codes).quantile(BOX_QUANTILES).unstack()
+    quantiles = quantiles.reindex(range(len(classes)))
+    quantiles.index = classes
+
+    return edges, counts, quantiles
+
+
+def _bit_length(values):
+    '''
+    This function returns the number of bits of every value of a uint64
+    array, by binary search over the shifts
+
+    '''
+    length = np.zeros(len(values), dtype = np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >> np.uint64(shift)
+        move = high > 0
+        length += move * shift
+        values = np.where(move, high, values)
+    return length + (values > 0)
+
+
+def _hashable(values):
+    '''
+    This function returns the non missing values of a column as an array
+    to hash. Numbers are hashed as floats so 1 and 1.0 are the same value
+    whatever dtype a chunk was read with.
+
+    '''
+    values = pd.Series(values).dropna()
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype = float)
+    return values.to_numpy(dtype = object)
+
+
+class HyperLogLog:
+    '''
+    Sketch of the number of distinct values of a stream in 2 ** precision
+    bytes, with a relative error of about 1.04 / sqrt(2 ** precision)
+    (0.8% for the default). Sketches of different chunks merge exactly.
+
+    '''
+
+    def __init__(self, precision = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype = np.uint8)
+
+    def update(self, values):
+        '''
+        This function adds the values of a column or array to the sketch
+
+        '''
+        values = _hashable(values)
+        if not len(values):
+            return
+        h = pd.util.hash_array(values)
+        tail = 64 - self.precision
+        index = (h >> np.uint64(tail)).astype(np.intp)
+        rank = tail - _bit_length(h & np.uint64((1 << tail) - 1)) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        '''
+        This function adds another sketch of the same precision
+
+        '''
+        if other.precision != self.precision:
+            raise ValueError('sketches with different precisions cannot be merged')
+        np.maximum(self.registers, other.registers, out = self.registers)
+        return self
+
+    def estimate(self):
+        '''
+        This function returns the estimated number of distinct values
+
+        '''
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        # linear counting is more accurate for small counts
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)
+        return float(raw)
+
+
+class StreamingHistogram:
+    '''
+    Histogram with a fixed number of bins over a stream whose range is not
+    known in advance, with one row of counts per class.
+
+    The bins are aligned to powers of two: bin i covers
+    [(start + i) * 2 ** exponent, (start + i + 1) * 2 ** exponent). When
+    values fall outside, the bins are widened by powers of two and the
+    counts are added up exactly, so histograms of different chunks merge
+    without going back to the data. Widening can leave a quarter of the
+    bins in use, hence the high default number of bins.
+
+    '''
+
+    def __init__(self, bins = 256):
+        self.bins = bins
+        self.exponent = None
+        self.start = 0
+        self.counts = np.zeros((1, bins))
+
+    @property
+    def edges(self):
+        '''
+        Bin edges, one more than the number of bins
+
+        '''
+        if self.exponent is None:
+            return np.linspace(0.0, 1.0, self.bins + 1)
+        return np.ldexp(self.start + np.arange(self.bins + 1, dtype = float), self.exponent)
+
+    def _cover(self, low, high, exponent = None):
+        '''
+        This function returns the exponent and start of the finest grid
+        that holds the bins counted so far and [low, high]
+
+        '''
+        if self.exponent is not None:
+            width = np.ldexp(1.0, self.exponent)
+            used = np.flatnonzero(self.counts.any(axis = 0))
+            if len(used):
+                low = min(low, (self.start + used[0]) * width)
+                high = max(high, (self.start + used[-1]) * width)
+            exponent = self.exponent if exponent is None else max(exponent, self.exponent)
+
+        if exponent is None:
+            span = high - low
+            scale = max(abs(low), abs(high))
+            if span > 0:
+                exponent = int(np.floor(np.log2(span / self.bins)))
+            else:
+                exponent = int(np.floor(np.log2(scale))) - 8 if scale > 0 else 0
+
+        while True:
+            width = np.ldexp(1.0, exponent)
+            first = int(np.floor(low / width))
+            if int(np.floor(high / width)) - first < self.bins:
+                return exponent, first
+            exponent += 1
+
+    def _moved(self, exponent, start, to_exponent, to_start):
+        '''
+        This function returns the bin of the grid (to_exponent, to_start)
+        that every bin of the grid (exponent, start) falls in
+
+        '''
+        old = start + np.arange(self.bins, dtype = np.int64)
+        return (old >> (to_exponent - exponent)) - to_start
+
+    def _regrid(self, exponent, start):
+        '''
+        This function moves the counts to a grid that holds all counted bins
+
+        '''
+        if self.exponent is not None and (exponent, start) != (self.exponent, self.start):
+            index = self._moved(self.exponent, self.start, exponent, start)
+            # empty bins may fall outside the new grid
+            keep = (index >= 0) & (index < self.bins)
+            counts = np.zeros_like(self.counts)
+            np.add.at(counts.T, index[keep], self.counts.T[keep])
+            self.counts = counts
+        self.exponent, self.start = exponent, start
+
+    def _grow(self, classes):
+        '''
+        This function adds rows of counts for new classes
+
+        '''
+        if classes > len(self.counts):
+            extra = np.zeros((classes - len(self.counts), self.bins))
+            self.counts = np.vstack([self.counts, extra])
+
+    def update(self, values, codes = None):
+        '''
+        This function counts values, optionally with a class code per value.
+        Missing and infinite values and negative codes are skipped.
+
+        '''
+        values = np.asarray(values, dtype = float)
+        keep = np.isfinite(values)
+        if codes is not None:
+            codes = np.asarray(codes)
+            keep &= codes >= 0
+            codes = codes[keep]
+        values = values[keep]
+        if not len(values):
+            return
+
+        self._regrid(*self._cover(float(values.min()), float(values.max())))
+        self._grow(1 if codes is None else int(codes.max()) + 1)
+
+        index = np.floor(np.ldexp(values, -self.exponent)).astype(np.int64) - self.start
+        # guard against round-off at the outer edges
+        np.clip(index, 0, self.bins - 1, out = index)
+        if codes is not None:
+            index += codes * self.bins
+        self.counts += np.bincount(index, minlength = self.counts.size).reshape(self.counts.shape)
+
+    def merge(self, other, codes = None):
+        '''
+        This function adds the counts of another histogram with the same
+        number of bins. codes maps the classes of other to classes of this
+        histogram.
+
+        '''
+        if other.bins != self.bins:
+            raise ValueError('histograms with different numbers of bins cannot be merged')
+        if other.exponent is None:
+            return self
+
+        used = np.flatnonzero(other.counts.any(axis = 0))
+        if not len(used):
+            return self
+        width = np.ldexp(1.0, other.exponent)
+        low, high = (other.start + used[0]) * width, (other.start + used[-1]) * width
+        self._regrid(*self._cover(low, high, other.exponent))
+
+        rows = np.arange(len(other.counts)) if codes is None else np.asarray(codes)
+        self._grow(int(rows.max()) + 1)
+        index = self._moved(other.exponent, other.start, self.exponent, self.start)
+        keep = (index >= 0) & (index < self.bins)
+        np.add.at(self.counts, (rows[:, None], index[None, keep]), other.counts[:, keep])
+        return self
+
+    def quantiles(self, q):
+        '''
+        This function returns the quantiles q of every class, interpolated
+        within the bins, as an array of shape (classes, len(q))
+
+        '''
+        q = np.atleast_1d(np.asarray(q, dtype = float))
+        edges = self.edges
+        cumulative = np.hstack([np.zeros((len(self.counts), 1)), np.cumsum(self.counts, axis = 1)])
+        result = np.full((len(self.counts), len(q)), np.nan)
+        for row, cum in enumerate(cumulative):
+            if cum[-1] > 0:
+                # first edge with mass on its right, last edge with mass on its left
+                lo = np.searchsorted(cum, 0, side = 'right') - 1
+                hi = np.searchsorted(cum, cum[-1], side = 'left')
+                result[row] = np.interp(q * cum[-1], cum[lo:hi + 1], edges[lo:hi + 1])
+        return result
+
+
+def _numeric_block(frame):
+    '''
+    This function returns the columns of a frame as a float array. Chunks of
+    a csv file may be read with other dtypes than the first one, values
+    that are not numbers become missing.
+
+    '''
+    if all(pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes):
+        return frame.to_numpy(dtype = float, na_value = np.nan)
+    return frame.apply(pd.to_numeric, errors = 'coerce').to_numpy(dtype = float, na_value = np.nan)
+
+
+def _merge_moments(count, mean, m2, other_count, other_mean, other_m2):
+    '''
+    This function merges column counts, means and sums of squared
+    deviations (Chan et al.) and returns the merged arrays
+
+    '''
+    total = count + other_count
+    delta = other_mean - mean
+    weight = other_count / np.maximum(total, 1)
+    return total, mean + delta * weight, m2 + other_m2 + delta ** 2 * count * weight
+
+
+class Profile:
+    '''
+    Mergeable summary of a data set built chunk by chunk, that the dsyl
+    plots can render from without the data: null counts, exact value
+    counts or HyperLogLog unique counts, moments and histograms of the
+    numeric columns, and their correlation matrix.
+
+    With a target column, value counts and histograms are kept per target
+    class. Rows with a missing target are left out of the per class
+    histograms only.
+
+    unique = 'exact' keeps the value counts of every column, 'hll' only
+    sketches the unique counts and 'auto' switches a column to a sketch
+    once it has more than max_exact distinct values.
+
+    '''
+
+    def __init__(self, columns, numeric, target = None, bins = 256, unique = 'auto',
+                 max_exact = 10_000, precision = 14):
+        if unique not in ('auto', 'exact', 'hll'):
+            raise ValueError("unique must be 'auto', 'exact' or 'hll'")
+        if target is not None and target not in columns:
+            raise ValueError('target {} is not a column'.format(target))
+
+        self.columns = list(columns)
+        self.numeric = list(numeric)
+        self.target = target
+        self.unique = unique
+        self.max_exact = max_exact
+        self.precision = precision
+
+        self.rows = 0
+        self.nulls = np.zeros(len(self.columns), dtype = np.int64)
+        self.classes = []
+
+        p = len(self.numeric)
+        self.count = np.zeros(p)
+        self.mean = np.zeros(p)
+        self.m2 = np.zeros(p)
+        self.min = np.full(p, np.inf)
+        self.max = np.full(p, -np.inf)
+        self.histograms = [StreamingHistogram(bins) for _ in self.numeric]
+        self.correlations = None
+
+        self.counts = {}
+        self.sketches = {}
+        if unique == 'hll':
+            self.sketches = {name: HyperLogLog(precision) for name in self.columns}
+
+    @classmethod
+    def from_frame(cls, frame, **kwargs):
+        '''
+        This function creates an empty profile with the columns of a frame
+
+        '''
+        return cls(frame.columns, frame.select_dtypes('number').columns, **kwargs)
+
+    def _codes(self, labels):
+        '''
+        This function returns the class code of every target value, -1 for
+        missing values, adding new classes as they appear
+
+        '''
+        inverse, uniques = pd.factorize(labels)
+        known = {label: code for code, label in enumerate(self.classes)}
+        mapping = np.empty(len(uniques), dtype = np.int64)
+        for i, label in enumerate(uniques):
+            if label not in known:
+                known[label] = len(self.classes)
+                self.classes.append(label)
+            mapping[i] = known[label]
+        if not len(uniques):
+            return np.full(len(inverse), -1, dtype = np.int64)
+        return np.where(inverse >= 0, mapping[inverse], -1)
+
+    def _sketch(self, name, counts):
+        '''
+        This function replaces the value counts of a column by a sketch
+
+        '''
+        sketch = HyperLogLog(self.precision)
+        values = counts.index if self.target is None else counts.index.get_level_values(0)
+        sketch.update(values.unique())
+        self.sketches[name] = sketch
+        self.counts.pop(name, None)
+
+    def _add_counts(self, name, counts):
+        '''
+        This function adds value counts of a column, switching to a sketch
+        when there are too many distinct values
+
+        '''
+        if name in self.counts:
+            counts = self.counts[name].add(counts, fill_value = 0)
+        if self.unique == 'auto' and len(counts) > self.max_exact:
+            distinct = len(counts) if self.target is None else \
+                counts.index.get_level_values(0).nunique()
+            if distinct > self.max_exact:
+                self._sketch(name, counts)
+                return
+        self.counts[name] = counts
+
+    def update(self, chunk):
+        '''
+        This function adds a chunk of rows to the profile
+
+        '''
+        chunk = chunk[self.columns]
+        self.rows += len(chunk)
+        self.nulls += chunk.isna().sum().to_numpy(dtype = np.int64)
+
+        codes = None
+        if self.target is not None:
+            codes = self._codes(chunk[self.target])
+
+        for name in self.columns:
+            values = chunk[name]
+            if name in self.sketches:
+                self.sketches[name].update(values)
+            elif codes is None:
+                self._add_counts(name, values.value_counts())
+            else:
+                self._add_counts(name, pd.DataFrame({'value': values.to_numpy(),
+                                                     'code': codes}).value_counts())
+
+        if not self.numeric:
+            return
+
+        block = _numeric_block(chunk[self.numeric])
+        present = ~np.isnan(block)
+        count = present.sum(axis = 0)
+        mean = np.where(present, block, 0.0).sum(axis = 0) / np.maximum(count, 1)
+        m2 = (np.where(present, block - mean, 0.0) ** 2).sum(axis = 0)
+        self.count, self.mean, self.m2 = _merge_moments(self.count, self.mean, self.m2,
+                                                        count, mean, m2)
+        self.min = np.fmin(self.min, np.where(present, block, np.inf).min(axis = 0, initial = np.inf))
+        self.max = np.fmax(self.max, np.where(present, block, -np.inf).max(axis = 0, initial = -np.inf))
+
+        for i, histogram in enumerate(self.histograms):
+            histogram.update(block[:, i], codes)
+
+        if self.correlations is None:
+            self.correlations = CorrelationAccumulator(self.numeric, _column_means(block))
+        self.correlations.update(block)
+
+    def merge(self, other):
+        '''
+        This function adds another profile of the same columns, e.g. of
+        another file or of chunks read by another worker
+
+        '''
+        if (other.columns, other.numeric, other.target) != (self.columns, self.numeric, self.target):
+            raise ValueError('profiles of different columns cannot be merged')
+
+        codes = self._codes(pd.Series(other.classes, dtype = object))
+
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.count, self.mean, self.m2 = _merge_moments(self.count, self.mean, self.m2,
+                                                        other.count, other.mean, other.m2)
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+
+        for histogram, theirs in zip(self.histograms, other.histograms):
+            histogram.merge(theirs, codes if len(codes) else None)
+
+        if other.correlations is not None:
+            if self.correlations is None:
+                self.correlations = CorrelationAccumulator(self.numeric, other.correlations.shift)
+            self.correlations.merge(other.correlations)
+
+        for name in self.columns:
+            counts = other.counts.get(name)
+            if counts is not None and self.target is not None:
+                # move the class codes of other to the codes of this profile
+                value = counts.index.get_level_values(0)
+                code = counts.index.get_level_values(1).to_numpy()
+                code = np.where(code >= 0, codes[np.maximum(code, 0)] if len(codes) else -1, -1)
+                counts = pd.Series(counts.to_numpy(), index = pd.MultiIndex.from_arrays(
+                    [value, code], names = counts.index.names))
+
+            if name in self.sketches or name in other.sketches:
+                if name in self.counts:
+                    self._sketch(name, self.counts[name])
+                # either side may have seen no values of the column
+                sketch = self.sketches.setdefault(name, HyperLogLog(self.precision))
+                if name in other.sketches:
+                    sketch.merge(other.sketches[name])
+                elif counts is not None:
+                    values = counts.index if self.target is None else counts.index.get_level_values(0)
+                    sketch.update(values.unique())
+            elif counts is not None:
+                self._add_counts(name, counts)
+
+        return self
+
+    def missing(self):
+        '''
+        This function returns the number of missing values of every column
+
+        '''
+        return pd.Series(self.nulls, index = self.columns)
+
+    def unique_counts(self):
+        '''
+        This function returns the number of distinct values of every
+        column, estimated for the columns kept as sketches
+
+        '''
+        result = {}
+        for name in self.columns:
+            if name in self.sketches:
+                result[name] = int(round(self.sketches[name].estimate()))
+            elif self.target is None:
+                result[name] = len(self.counts.get(name, ()))
+            else:
+                result[name] = self.counts[name].index.get_level_values(0).nunique() \
+                    if name in self.counts else 0
+        return pd.Series(result, dtype = 'int64')
+
+    def value_counts(self, col, hue = None):
+        '''
+        This function returns the counts of every value of a column as a
+        DataFrame with the columns col, hue (if given) and count
+
+        '''
+        if col not in self.counts:
+            raise ValueError('no value counts kept for {}, it has too many distinct values'.format(col))
+        if hue is not None and hue != self.target:
+            raise ValueError('counts are kept by the target {} only'.format(self.target))
+
+        counts = self.counts[col]
+        if self.target is None:
+            frame = pd.DataFrame({col: counts.index, 'count': counts.to_numpy()})
+        else:
+            frame = pd.DataFrame({col: counts.index.get_level_values(0),
+                                  'code': counts.index.get_level_values(1),
+                                  'count': counts.to_numpy()})
+            if hue is None:
+                frame = frame.groupby(col, as_index = False, sort = False)['count'].sum()
+            else:
+                frame = frame[frame['code'] >= 0]
+                labels = np.array(self.classes, dtype = object)
+                frame = pd.DataFrame({col: frame[col], hue: labels[frame['code'].to_numpy()],
+                                      'count': frame['count']})
+
+        frame['count'] = frame['count'].astype('int64')
+        return frame.sort_values(list(frame.columns[:-1])).reset_index(drop = True)
+
+    def describe(self):
+        '''
+        This function returns count, mean, std, min and max of the numeric
+        columns as a DataFrame
+
+        '''
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            std = np.sqrt(self.m2 / (self.count - 1))
+        empty = self.count == 0
+        return pd.DataFrame({'count': self.count,
+                             'mean': np.where(empty, np.nan, self.mean),
+                             'std': np.where(self.count > 1, std, np.nan),
+                             'min': np.where(empty, np.nan, self.min),
+                             'max': np.where(empty, np.nan, self.max)}, index = self.numeric)
+
+    def corr(self):
+        '''
+        This function returns the correlation matrix of the numeric columns
+
+        '''
+        if self.correlations is None:
+            return CorrelationAccumulator(self.numeric).corr()
+        return self.correlations.corr()
+
+    def histogram(self, col):
+        '''
+        This function returns the bin edges of a numeric column and its
+        counts, one column per target class
+
+        '''
+        histogram = self.histograms[self.numeric.index(col)]
+        labels = [col] if self.target is None else self.classes
+        counts = np.zeros((len(labels), histogram.bins))
+        rows = min(len(labels), len(histogram.counts))
+        counts[:rows] = histogram.counts[:rows]
+        return histogram.edges, pd.DataFrame(counts.T, columns = labels)
+
+    def class_distribution(self, col, target):
+        '''
+        This function returns the bin edges, the counts per class and the
+        box plot quantiles per class of a numeric column (see
+        class_distribution), read from the histograms
+
+        '''
+        if target != self.target:
+            raise ValueError('the profile was built for the target {}'.format(self.target))
+
+        edges, counts = self.histogram(col)
+        quantiles = self.histograms[self.numeric.index(col)].quantiles(BOX_QUANTILES)
+        quantiles = pd.DataFrame(quantiles[:len(counts.columns)], index = counts.columns,
+                                 columns = BOX_QUANTILES)
+        order = sorted(counts.columns)
+        return edges, counts[order], quantiles.loc[order]
+
+    def __repr__(self):
+        return 'profile of {} rows and {} columns ({} numeric)'.format(
+            self.rows, len(self.columns), len(self.numeric))
+
+
+def _read_chunks(source, chunksize, columns = None, **kwargs):
+    '''
+    This function yields DataFrame chunks of a csv or parquet file, a
+    DataFrame or an iterator of DataFrames
+
+    '''
+    if isinstance(source, pd.DataFrame):
+        if columns is not None:
+            source = source[columns]
+        if len(source) == 0:
+            yield source
+        yield from _row_blocks(source, chunksize)
+    elif isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        if path.endswith(('.parquet', '.pq')):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(path).iter_batches(batch_size = chunksize, columns = columns):
+                yield batch.to_pandas()
+        else:
+            with pd.read_csv(path, chunksize = chunksize, usecols = columns, **kwargs) as reader:
+                yield from reader
+    else:
+        for chunk in source:
+            chunk = chunk if isinstance(chunk, pd.DataFrame) else pd.DataFrame(chunk)
+            yield chunk if columns is None else chunk[columns]
+
+
+def profile(source, chunksize = 100_000, target = None, columns = None, bins = 256,
+            unique = 'auto', max_exact = 10_000, precision = 14, **kwargs):
+    '''
+    This function profiles a data set in one pass over chunks, without
+    holding more than one chunk in memory
+
+    source is a csv or parquet file name, a DataFrame or an iterator of
+    DataFrames; other keyword arguments go to pandas.read_csv. The
+    returned Profile can be passed to plot_missing, plot_unique, plot_corr
+    and plot_distribution instead of a DataFrame, and profiles of
+    different parts of a data set can be merged.
+
+    '''
+    result = None
+    for chunk in _read_chunks(source, chunksize, columns, **kwargs):
+        if result is None:
+            result = Profile.from_frame(chunk, target = target, bins = bins, unique = unique,
+                                        max_exact = max_exact, precision = precision)
+        result.update(chunk)
+
+    if result is None:
+        raise ValueError('no data to profile')
+    return result
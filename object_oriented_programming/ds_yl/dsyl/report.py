@@ -0,0 +1,184 @@
+'''
+Headless batch rendering of dsyl plots
+
+column_specs
+render_report
+
+'''
+import os
+import re
+import time
+
+import pandas as pd
+
+from .profiling import profile
+
+# plots that can be drawn from a Profile, and the argument naming its target
+REPORT_PLOTS = {'plot_missing': None, 'plot_corr': None,
+                'plot_unique': 'hue', 'plot_distribution': 'target'}
+
+# default arguments the plot functions require
+REPORT_DEFAULTS = {'plot_corr': {'figsize': (15, 8)}}
+
+
+def column_specs(plot, dataset, columns, **kwargs):
+    '''
+    This function returns one plot spec per column, e.g. for
+    plot_unique or plot_distribution over every column of a data set
+
+    '''
+    return [dict(plot = plot, dataset = dataset, col = col, **kwargs) for col in columns]
+
+
+def _normalize(spec, index):
+    '''
+    This function checks a plot spec and splits it into the plot name,
+    the dataset, the file name and the plot arguments
+
+    '''
+    spec = dict(spec)
+    plot = spec.pop('plot')
+    if plot not in REPORT_PLOTS:
+        raise ValueError('{} cannot be rendered from a profile, use one of {}'.format(
+            plot, ', '.join(REPORT_PLOTS)))
+    dataset = spec.pop('dataset')
+
+    kwargs = dict(REPORT_DEFAULTS.get(plot, {}))
+    kwargs.update(spec)
+    name = kwargs.pop('name', None)
+    if name is None:
+        parts = [str(dataset), plot] + ([str(kwargs['col'])] if 'col' in kwargs else [])
+        name = '{:04d}_{}'.format(index, re.sub(r'[^\w.-]+', '_', '_'.join(parts)))
+
+    target = kwargs.get(REPORT_PLOTS[plot]) if REPORT_PLOTS[plot] else None
+    return {'index': index, 'plot': plot, 'dataset': dataset, 'target': target,
+            'name': name, 'kwargs': kwargs}
+
+
+def _headless():
+    '''
+    This function switches matplotlib to the non interactive Agg backend,
+    so plt.show() in the plot functions does nothing
+
+    '''
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend('Agg')
+
+
+def _profile_job(source, target, chunksize):
+
+    return profile(source, chunksize = chunksize, target = target)
+
+
+def _render_batch(batch, profiles, output_dir, format, dpi):
+    '''
+    This function renders a list of normalized specs with their profiles
+    and returns one result row per spec
+
+    '''
+    import matplotlib.pyplot as plt
+    from . import commonfunctions
+
+    rows = []
+    for spec in batch:
+        path = os.path.join(output_dir, '{}.{}'.format(spec['name'], format))
+        start = time.perf_counter()
+        error = None
+        try:
+            plot = getattr(commonfunctions, spec['plot'])
+            plot(profiles[spec['key']], **spec['kwargs'])
+            plt.gcf().savefig(path, format = format, dpi = dpi)
+        except Exception as exc:
+            error = '{}: {}'.format(type(exc).__name__, exc)
+            path = None
+        finally:
+            plt.close('all')
+        rows.append({'index': spec['index'], 'plot': spec['plot'], 'dataset': spec['dataset'],
+                     'file': path, 'seconds': time.perf_counter() - start, 'error': error})
+    return rows
+
+
+def render_report(specs, datasets, output_dir, format = 'png', workers = None, dpi = 100,
+                  chunksize = 100_000, batches_per_worker = 4):
+    '''
+    This function renders many dsyl plots to files without a display,
+    e.g. in a nightly batch job
+
+    specs is a list of dicts with the keys plot (plot_missing, plot_corr,
+    plot_unique or plot_distribution), dataset (a key of datasets),
+    optionally name (the file name without extension), and the arguments
+    of the plot function (see column_specs). datasets maps names to
+    DataFrames or csv/parquet file names.
+
+    Every dataset is profiled once (once per target if its specs use
+    different targets) and all plots are drawn from the profiles on the
+    Agg backend in a process pool of workers processes (all cores by
+    default, workers = 1 renders in this process). Files are written to
+    output_dir as png or svg.
+
+    Returns a DataFrame with plot, dataset, file, seconds and error per
+    spec, in the order of specs. A failing plot is reported there instead
+    of stopping the report.
+
+    '''
+    if format not in ('png', 'svg'):
+        raise ValueError("format must be 'png' or 'svg'")
+    os.makedirs(output_dir, exist_ok = True)
+
+    specs = [_normalize(spec, index) for index, spec in enumerate(specs)]
+
+    # one profile per dataset and target; specs without a target use any
+    targets = {}
+    for spec in specs:
+        if spec['dataset'] not in datasets:
+            raise ValueError('unknown dataset {}'.format(spec['dataset']))
+        targets.setdefault(spec['dataset'], [])
+        if spec['target'] is not None and spec['target'] not in targets[spec['dataset']]:
+            targets[spec['dataset']].append(spec['target'])
+    for spec in specs:
+        known = targets[spec['dataset']]
+        spec['key'] = (spec['dataset'], spec['target'] if spec['target'] is not None
+                       else (known[0] if known else None))
+    keys = list(dict.fromkeys(spec['key'] for spec in specs))
+
+    workers = os.cpu_count() if workers is None else workers
+
+    if workers <= 1:
+        import matplotlib.pyplot as plt
+
+        backend = plt.get_backend()
+        _headless()
+        try:
+            profiles = {key: _profile_job(datasets[key[0]], key[1], chunksize) for key in keys}
+            rows = _render_batch(specs, profiles, output_dir, format, dpi)
+        finally:
+            plt.switch_backend(backend)
+        return pd.DataFrame(rows).set_index('index').sort_index()
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers = workers, initializer = _headless) as pool:
+        # DataFrames are profiled here rather than pickled to a worker
+        futures = {}
+        profiles = {}
+        for key in keys:
+            source = datasets[key[0]]
+            if isinstance(source, pd.DataFrame):
+                profiles[key] = _profile_job(source, key[1], chunksize)
+            else:
+                futures[key] = pool.submit(_profile_job, source, key[1], chunksize)
+        for key, future in futures.items():
+            profiles[key] = future.result()
+
+        # batches of specs of one profile, so each batch ships one profile
+        size = max(1, -(-len(specs) // (workers * batches_per_worker)))
+        jobs = []
+        for key in keys:
+            group = [spec for spec in specs if spec['key'] == key]
+            for start in range(0, len(group), size):
+                jobs.append(pool.submit(_render_batch, group[start:start + size],
+                                        {key: profiles[key]}, output_dir, format, dpi))
+        rows = [row for job in jobs for row in job.result()]
+
+    return pd.DataFrame(rows).set_index('index').sort_index()
@@ -0,0 +1,255 @@
+'''
+Benchmark suite for the hot paths of dist_package_yl
+
+Covers file ingestion at several sizes, mean/stdev fitting, scalar and
+array pdf, Binomial pmf tables for growing n and chains of additions.
+Every benchmark reports the best time of a few repeats, the throughput in
+items per second and the peak memory traced during one run. Results are
+written to benchmarks/results/ as JSON so runs can be compared.
+
+Usage:
+    python benchmarks/bench_hot_paths.py [--quick] [--repeat 3] [--compare results/old.json]
+
+'''
+import argparse
+import datetime
+import functools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from dist_package_yl import Gaussian, Binomial, sum_distributions
+
+RESULTS = os.path.join(ROOT, 'benchmarks', 'results')
+
+
+def bench_read_text(tmp, n):
+    '''
+    This function returns a run that streams a text file of n floats
+
+    '''
+    file_name = os.path.join(tmp, 'values_{}.txt'.format(n))
+    np.savetxt(file_name, np.random.default_rng(0).normal(size=n))
+
+    def run():
+        Gaussian().read_data_file(file_name, keep_data=False)
+    return run, n
+
+
+def bench_read_npy(tmp, n):
+    '''
+    This function returns a run that memory-maps a .npy file of n floats
+
+    '''
+    file_name = os.path.join(tmp, 'values_{}.npy'.format(n))
+    np.save(file_name, np.random.default_rng(0).normal(size=n))
+
+    def run():
+        Gaussian().read_npy_file(file_name)
+    return run, n
+
+
+def bench_fit(tmp, n):
+    '''
+    This function returns a run that fits mean and stdev on n values
+
+    '''
+    data = np.random.default_rng(0).normal(size=n)
+    dist = Gaussian()
+
+    def run():
+        dist.data = data
+        dist.calculate_mean()
+        dist.calculate_stdev()
+    return run, n
+
+
+def bench_pdf_scalar(tmp, n):
+    '''
+    This function returns a run that calls pdf once per point
+
+    '''
+    points = np.random.default_rng(0).normal(size=n).tolist()
+    dist = Gaussian(0, 1)
+
+    def run():
+        for x in points:
+            dist.pdf(x)
+    return run, n
+
+
+def bench_pdf_array(tmp, n):
+    '''
+    This function returns a run that calls pdf once on an array of points
+
+    '''
+    points = np.random.default_rng(0).normal(size=n)
+    dist = Gaussian(0, 1)
+
+    def run():
+        dist.pdf(points)
+    return run, n
+
+
+def bench_pmf_table(tmp, n):
+    '''
+    This function returns a run that builds the full pmf table for n trials
+
+    '''
+    dist = Binomial(0.37, n)
+
+    def run():
+        dist.pmf_table()
+    return run, n + 1
+
+
+def bench_add_gaussian(tmp, n):
+    '''
+    This function returns a run that adds n Gaussians with a chain of +
+
+    '''
+    dists = [Gaussian(i, 1) for i in range(n)]
+
+    def run():
+        functools.reduce(lambda a, b: a + b, dists)
+    return run, n
+
+
+def bench_add_binomial(tmp, n):
+    '''
+    This function returns a run that adds n Binomials with equal p with a chain of +
+
+    '''
+    dists = [Binomial(0.3, 10) for _ in range(n)]
+
+    def run():
+        functools.reduce(lambda a, b: a + b, dists)
+    return run, n
+
+
+def bench_sum_binomial(tmp, n):
+    '''
+    This function returns a run that convolves n Binomials with different p
+
+    '''
+    rng = np.random.default_rng(0)
+    dists = [Binomial(float(p), 10) for p in rng.random(n)]
+
+    def run():
+        sum_distributions(dists)
+    return run, n
+
+
+SIZES = {
+    'quick': {'io': [10 ** 4, 10 ** 5], 'fit': [10 ** 5, 10 ** 6], 'scalar': [10 ** 3],
+              'array': [10 ** 6], 'pmf': [10 ** 3, 10 ** 5], 'add': [10 ** 3]},
+    'full': {'io': [10 ** 4, 10 ** 5, 10 ** 6], 'fit': [10 ** 5, 10 ** 6, 10 ** 7],
+             'scalar': [10 ** 4], 'array': [10 ** 6, 10 ** 7], 'pmf': [10 ** 3, 10 ** 5, 10 ** 6],
+             'add': [10 ** 3, 10 ** 4]},
+}
+
+BENCHMARKS = [
+    ('read_data_file', bench_read_text, 'io'),
+    ('read_npy_file', bench_read_npy, 'io'),
+    ('mean_stdev', bench_fit, 'fit'),
+    ('pdf_scalar', bench_pdf_scalar, 'scalar'),
+    ('pdf_array', bench_pdf_array, 'array'),
+    ('pmf_table', bench_pmf_table, 'pmf'),
+    ('add_chain_gaussian', bench_add_gaussian, 'add'),
+    ('add_chain_binomial', bench_add_binomial, 'add'),
+    ('sum_binomial_unequal_p', bench_sum_binomial, 'add'),
+]
+
+
+def measure(run, repeat):
+    '''
+    This function returns the best time of `repeat` runs and the peak
+    memory traced during an extra run
+
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def run_suite(sizes, repeat):
+    '''
+    This function runs every benchmark at every size and returns the results
+
+    '''
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory, group in BENCHMARKS:
+            for n in sizes[group]:
+                run, items = factory(tmp, n)
+                seconds, peak = measure(run, repeat)
+                key = '{}[{}]'.format(name, n)
+                results[key] = {'seconds': seconds, 'items': items,
+                                'throughput': items / seconds, 'peak_bytes': peak}
+                print('{:<36} {:>10.4f} s {:>14,.0f} items/s {:>10.2f} MB'.format(
+                    key, seconds, items / seconds, peak / 1e6))
+    return results
+
+
+def compare(results, file_name):
+    '''
+    This function prints the speed-up of each benchmark against an earlier run
+
+    '''
+    with open(file_name) as file:
+        previous = json.load(file)['results']
+
+    print('\ncompared with {}'.format(file_name))
+    for key, result in results.items():
+        if key in previous:
+            ratio = result['throughput'] / previous[key]['throughput']
+            print('{:<36} {:>6.2f}x throughput {:>+8.2f} MB peak'.format(
+                key, ratio, (result['peak_bytes'] - previous[key]['peak_bytes']) / 1e6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Benchmarks for dist_package_yl')
+    parser.add_argument('--quick', action = 'store_true', help = 'use small sizes only')
+    parser.add_argument('--repeat', type = int, default = 3)
+    parser.add_argument('--compare', help = 'results file of an earlier run')
+    parser.add_argument('--output', help = 'results file to write')
+    args = parser.parse_args()
+
+    results = run_suite(SIZES['quick' if args.quick else 'full'], args.repeat)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS, exist_ok = True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(RESULTS, '{}.json'.format(stamp))
+
+    with open(output, 'w') as file:
+        json.dump({'timestamp': datetime.datetime.now().isoformat(),
+                   'python': platform.python_version(), 'numpy': np.__version__,
+                   'quick': args.quick, 'results': results}, file, indent = 2)
+    print('\nresults written to {}'.format(output))
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
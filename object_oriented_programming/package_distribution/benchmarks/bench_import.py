@@ -0,0 +1,67 @@
+'''
+Import time benchmark for dist_package_yl
+
+Every repeat starts a fresh interpreter, imports numpy first (a required
+dependency whose cost is outside of the package) and then times
+`import dist_package_yl`. The run fails when the median time is over the
+budget or when the import pulled in matplotlib.
+
+Usage:
+    python benchmarks/bench_import.py [--budget-ms 30] [--repeat 7]
+
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, sys, time
+import numpy
+start = time.perf_counter()
+import dist_package_yl
+elapsed = time.perf_counter() - start
+print(json.dumps({'ms': elapsed * 1000, 'matplotlib': 'matplotlib' in sys.modules}))
+'''
+
+
+def measure_import(repeat):
+    '''
+    This function times the package import in `repeat` fresh interpreters
+
+    '''
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', CHILD], cwd = ROOT,
+                             check = True, capture_output = True, text = True)
+        runs.append(json.loads(out.stdout))
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Import time benchmark for dist_package_yl')
+    parser.add_argument('--budget-ms', type = float, default = 30.0)
+    parser.add_argument('--repeat', type = int, default = 7)
+    args = parser.parse_args()
+
+    runs = measure_import(args.repeat)
+    median = statistics.median(run['ms'] for run in runs)
+    plotting = any(run['matplotlib'] for run in runs)
+
+    print('import dist_package_yl: median {:.1f} ms over {} runs (budget {:.0f} ms)'.format(
+        median, args.repeat, args.budget_ms))
+
+    if plotting:
+        print('FAIL: importing the package loaded matplotlib')
+    if median > args.budget_ms:
+        print('FAIL: import time is over budget')
+
+    return 1 if plotting or median > args.budget_ms else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
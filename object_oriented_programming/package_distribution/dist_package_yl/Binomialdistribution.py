@@ -1,8 +1,10 @@
 
 # TODO: import necessary libraries
 import math
-import matplotlib.pyplot as plt
+import numpy as np
 from .Generaldistribution import Distribution
+from .Specialfunctions import gammaln
+from .Summarystatistics import BinomialSummary
 
 
 class Binomial(Distribution):
@@ -17,6 +19,13 @@ class Binomial(Distribution):
                 
     """
     
+    __slots__ = ('p', 'n')
+    
+    # outcomes are zeros and ones, so raw binary files store one byte each
+    binary_dtype = 'int8'
+    summary_class = BinomialSummary
+    sample_dtype = 'int64'
+    
     def __init__(self, p = 0.5, n = 20):
         
         self.p = p
@@ -86,6 +95,7 @@ class Binomial(Distribution):
     #           defined previously.
     def replace_stats_with_data(self):
         """Function to calculate p and n from the data set. The function updates the p and n variables of the object.
+        If the data was read with keep_data=False, the summary accumulated while reading is used instead.
         
         Args: 
             None
@@ -95,13 +105,28 @@ class Binomial(Distribution):
             float: the n value
     
         """
-        self.n = len(self.data)
-        self.p = sum(self.data)/len(self.data)
-        self.mean = self.calculate_mean()
-        self.stdev = self.calculate_stdev()
+        self.fit_summary(self.summarize_data())
         
         return self.p, self.n
     
+    def fit_summary(self, summary, sample=True):
+        """Function to update n, p, mean and standard deviation from a summary
+        of a data set of zeros and ones.
+        
+        Args: 
+            summary (BinomialSummary): summary of the data set
+            sample (bool): unused, kept for compatibility with Distribution
+        
+        Returns: 
+            None
+    
+        """
+        self.summary = summary
+        self.n = summary.trials
+        self.p = summary.successes / summary.trials
+        self.mean = self.calculate_mean()
+        self.stdev = self.calculate_stdev()
+    
     def plot_bar(self):
     # TODO: write a method plot_bar() that outputs a bar chart of the data set according to the following specifications.
         """Function to output a histogram of the instance variable data using 
@@ -113,6 +138,8 @@ class Binomial(Distribution):
         Returns:
             None
         """
+        import matplotlib.pyplot as plt
+
         plt.bar(x = ['0', '1'], height = [(1 - self.p) * self.n, self.p * self.n])
         plt.title('Bar Chart of Data')
         plt.xlabel('outcome')
@@ -125,18 +152,152 @@ class Binomial(Distribution):
         """Probability density function calculator for the binomial distribution.
         
         Args:
-            k (float): point for calculating the probability density function
+            k (int or array): points for calculating the probability density function
             
         
         Returns:
-            float: probability density function output
+            array: probability density function output
         """
-        def nCr(n,r):
-            f = math.factorial
-            return f(n) / (f(r) * f(n-r))
         
-        return 1.0 * nCr(self.n, k) * (self.p) ** k * (1 - self.p) ** (self.n - k)
+        return np.exp(self.logpdf(k))
     
+    def logpdf(self, k):
+        """Natural logarithm of the probability mass function. The binomial
+        coefficient is computed with log-gamma functions so large n does not
+        overflow.
+        
+        Args:
+            k (int or array): points for calculating the log probability
+        
+        Returns:
+            array: log probability mass output, -inf outside of 0..n
+        """
+        k = np.asarray(k, dtype=float)
+        valid = (k >= 0) & (k <= self.n) & (k == np.floor(k))
+        kv = np.where(valid, k, 0.0)
+        
+        log_coef = gammaln(self.n + 1.0) - gammaln(kv + 1.0) - gammaln(self.n - kv + 1.0)
+        
+        # 0 * log(0) is taken as 0 so that p = 0 and p = 1 behave
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_p = np.where(kv > 0, kv * np.log(self.p), 0.0)
+            log_q = np.where(self.n - kv > 0, (self.n - kv) * np.log1p(-self.p), 0.0)
+        
+        return np.where(valid, log_coef + log_p + log_q, -np.inf)
+    
+    def pmf_table(self):
+        """Function to calculate the probability mass function for every
+        k = 0..n in O(n). The mode is evaluated with log-gamma functions and
+        the rest of the table follows from the ratio of neighbouring terms,
+        
+            pmf(k + 1) = pmf(k) * (n - k) / (k + 1) * p / (1 - p),
+        
+        applied outwards from the mode with cumulative products. Starting
+        at the largest term keeps the products from overflowing, and far
+        tails underflow to zero instead.
+        
+        Args:
+            None
+        
+        Returns:
+            array: pmf values, the value at index k is the probability of k successes
+        """
+        n = self.n
+        p = np.float64(self.p)
+        mode = min(max(int(math.floor((n + 1) * p)), 0), n)
+        
+        table = np.empty(n + 1)
+        table[mode] = np.exp(self.logpdf(mode))
+        
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore', under='ignore'):
+            # ratios pmf(k + 1) / pmf(k) for k = mode..n-1
+            k = np.arange(mode, n, dtype=float)
+            up = (n - k) / (k + 1) * (p / (1 - p))
+            table[mode + 1:] = table[mode] * np.cumprod(up)
+            
+            # ratios pmf(k - 1) / pmf(k) for k = mode..1
+            k = np.arange(mode, 0, -1, dtype=float)
+            down = k / (n - k + 1) * ((1 - p) / p)
+            table[:mode] = (table[mode] * np.cumprod(down))[::-1]
+        
+        # the terms must sum to one, normalizing removes the rounding error
+        # of the log-gamma evaluation at the mode
+        table /= table.sum()
+        
+        return table
+    
+    def _data_logpdf(self, values):
+        """Function to calculate the log probability of single observations.
+        The data of a Binomial are zeros and ones, each one a Bernoulli(p) trial.
+        
+        Args:
+            values (array): outcomes, 0 or 1
+        
+        Returns:
+            array: log probability of each outcome
+        """
+        return Binomial(self.p, 1).logpdf(values)
+    
+    def cdf(self, k):
+        """Cumulative distribution function of the binomial distribution.
+        
+        Args:
+            k (float or array): points for calculating the cdf
+        
+        Returns:
+            array: probability of at most k successes
+        """
+        table = np.cumsum(self.pmf_table())
+        np.minimum(table, 1.0, out=table)
+        
+        return self._lookup(table, k, below=0.0, above=1.0)
+    
+    def sf(self, k):
+        """Survival function (1 - cdf) of the binomial distribution. The upper
+        tail is summed directly so small probabilities keep their precision.
+        
+        Args:
+            k (float or array): points for calculating the survival function
+        
+        Returns:
+            array: probability of more than k successes
+        """
+        pmf = self.pmf_table()
+        # table[i] holds P(X > i)
+        table = np.append(np.cumsum(pmf[:0:-1])[::-1], 0.0)
+        np.minimum(table, 1.0, out=table)
+        
+        return self._lookup(table, k, below=1.0, above=0.0)
+    
+    def _lookup(self, table, k, below, above):
+        """Function to read a cumulative table indexed by 0..n at the points k.
+        
+        Args:
+            table (array): cumulative values for k = 0..n
+            k (float or array): points to look up
+            below (float): value for k < 0
+            above (float): value for k >= n
+        
+        Returns:
+            array: table values at floor(k)
+        """
+        k = np.floor(np.asarray(k, dtype=float))
+        idx = np.clip(k, 0, self.n).astype(np.int64)
+        
+        return np.where(k < 0, below, np.where(k >= self.n, above, table[idx]))
+    
+    
+    def sample(self, size=None, rng=None):
+        """Function to draw random values from the binomial distribution.
+        
+        Args:
+            size (int or tuple): number or shape of values, None for one value
+            rng (int or Generator): seed or numpy random generator
+        
+        Returns:
+            int or array: random numbers of successes
+        """
+        return np.random.default_rng(rng).binomial(self.n, self.p, size)
     
     def plot_bar_pdf(self):
     # write a method to plot the probability density function of the binomial distribution
@@ -147,10 +308,11 @@ class Binomial(Distribution):
             None
         
         Returns:
-            list: x values for the pdf plot
-            list: y values for the pdf plot
+            array: x values for the pdf plot
+            array: y values for the pdf plot
             
         """
+        import matplotlib.pyplot as plt
     
         # TODO: Use a bar chart to plot the probability density function from
         # k = 0 to k = n
@@ -162,12 +324,8 @@ class Binomial(Distribution):
 
         #   This method should also return the x and y values used to make the chart
         #   The x and y values should be stored in separate lists
-        x = []
-        y = []
-        
-        for k in range(self.n + 1):
-            x.append(k)
-            y.append(self.pdf(k))
+        x = np.arange(self.n + 1)
+        y = self.pmf_table()
             
         plt.bar(x,y)
         plt.title('Probability Mass Function of Binomial Distribution')
@@ -181,27 +339,23 @@ class Binomial(Distribution):
     def __add__(self, other):
     # write a method to output the sum of two binomial distributions. Assume both distributions have the same p value.
         
-        """Function to add together two Binomial distributions with equal p
+        """Function to add together two Binomial distributions. With equal p the
+        result is again Binomial, otherwise the probability mass functions are
+        convolved (see Convolution.sum_distributions).
         
         Args:
-            other (Binomial): Binomial instance
+            other (Binomial or Discrete): distribution instance
             
         Returns:
-            Binomial: Binomial distribution
+            Binomial: Binomial distribution if both p are equal
+            Discrete: distribution of the sum otherwise
             
         """
     
-        try:
-            assert self.p == other.p, 'p values are not equal'
-        except AssertionError as error:
-            raise
-        
-        # TODO: Define addition for two binomial distributions. Assume that the
-        # p values of the two distributions are the same. The formula for 
-        # summing two binomial distributions with different p values is more complicated,
-        # so you are only expected to implement the case for two distributions with equal p.
-        
-        # the try, except statement above will raise an exception if the p values are not equal
+        if not isinstance(other, Binomial) or self.p != other.p:
+            from .Convolution import sum_distributions
+            
+            return sum_distributions([self, other])
         
         # Hint: When adding two binomial distributions, the p value remains the same
         #   The new n value is the sum of the n values of the two distributions.
@@ -0,0 +1,104 @@
+
+import numpy as np
+from .Gaussiandistribution import Gaussian
+from .Binomialdistribution import Binomial
+from .Discretedistribution import Discrete
+from .Distributionbatch import GaussianBatch, BinomialBatch
+
+
+def convolve_pmfs(stack, support=None):
+    """Function to convolve many probability mass functions as a balanced
+    tree. Every level pairs up the rows of the stack and convolves all
+    pairs at once with one real FFT along the rows, so k functions take
+    log2(k) vectorized steps instead of k - 1 pairwise convolutions.
+
+    FFT round-off leaves values of about 1e-16 times the largest
+    probability; negative values are clipped and the result is normalized.
+
+    Args:
+        stack (2d array): one probability mass function per row, padded with zeros
+        support (array): largest value with nonzero mass of each row,
+            defaults to the full width
+
+    Returns:
+        array: probability mass function of the sum
+    """
+    stack = np.atleast_2d(np.asarray(stack, dtype=float))
+
+    if support is None:
+        support = np.full(len(stack), stack.shape[1] - 1)
+    support = np.asarray(support, dtype=np.int64)
+
+    while len(stack) > 1:
+        if len(stack) % 2:
+            # pad with the distribution of the constant 0
+            identity = np.zeros((1, stack.shape[1]))
+            identity[0, 0] = 1.0
+            stack = np.vstack([stack, identity])
+            support = np.append(support, 0)
+
+        support = support[0::2] + support[1::2]
+        width = int(support.max()) + 1
+        nfft = 1 << (width - 1).bit_length()
+
+        spec = np.fft.rfft(stack, nfft, axis=1)
+        stack = np.fft.irfft(spec[0::2] * spec[1::2], nfft, axis=1)[:, :width]
+        np.maximum(stack, 0.0, out=stack)
+
+    pmf = stack[0, :int(support[0]) + 1]
+
+    return pmf / pmf.sum()
+
+
+def sum_distributions(distributions):
+    """Function to add together many independent distributions.
+
+    Gaussians add their means and variances, summed pairwise by numpy.
+    Binomials with one common p give a Binomial. Binomials with different
+    p and Discrete distributions are convolved with convolve_pmfs and
+    give a Discrete distribution (a Poisson binomial distribution).
+
+    Args:
+        distributions (list, GaussianBatch or BinomialBatch): distributions to add
+
+    Returns:
+        Gaussian, Binomial or Discrete: distribution of the sum
+    """
+    if isinstance(distributions, GaussianBatch):
+        return Gaussian(float(np.sum(distributions.mean)),
+                        float(np.sqrt(np.sum(distributions.stdev ** 2))))
+
+    if isinstance(distributions, BinomialBatch):
+        batch = distributions
+        others = []
+    else:
+        distributions = list(distributions)
+
+        if not distributions:
+            raise ValueError('at least one distribution is needed')
+
+        if all(isinstance(d, Gaussian) for d in distributions):
+            return sum_distributions(GaussianBatch.from_distributions(distributions))
+
+        binomials = [d for d in distributions if isinstance(d, Binomial)]
+        others = [d for d in distributions if isinstance(d, Discrete)]
+
+        if len(binomials) + len(others) != len(distributions):
+            raise TypeError('only Gaussian, or Binomial and Discrete distributions can be added')
+
+        batch = BinomialBatch.from_distributions(binomials)
+
+    if not others and len(batch) and np.all(batch.p == batch.p[0]):
+        return Binomial(float(batch.p[0]), int(batch.n.sum()))
+
+    support = np.concatenate([batch.n, [d.n for d in others]]).astype(np.int64)
+    width = int(support.max()) + 1
+
+    stack = np.zeros((len(support), width))
+    k = np.arange(width)[:, None]
+    if len(batch):
+        stack[:len(batch)] = batch.pdf(k).T
+    for row, d in enumerate(others, start=len(batch)):
+        stack[row, :d.n + 1] = d.pmf
+
+    return Discrete(convolve_pmfs(stack, support))
@@ -0,0 +1,116 @@
+
+import numpy as np
+from .Generaldistribution import Distribution
+from .Binomialdistribution import Binomial
+
+
+class Discrete(Distribution):
+    """ Distribution on the integers 0..n given by its probability mass
+    function, e.g. the sum of Binomial distributions with different p.
+
+    Attributes:
+        mean (float) representing the mean value of the distribution
+        stdev (float) representing the standard deviation of the distribution
+        pmf (array) probability of each value 0..n
+        n (int) largest value of the support
+
+    """
+
+    __slots__ = ('pmf', 'n')
+
+    sample_dtype = 'int64'
+
+    def __init__(self, pmf):
+
+        self.pmf = np.asarray(pmf, dtype=float)
+        self.n = len(self.pmf) - 1
+
+        k = np.arange(self.n + 1)
+        mean = float(np.dot(k, self.pmf))
+        stdev = float(np.sqrt(np.dot((k - mean) ** 2, self.pmf)))
+
+        Distribution.__init__(self, mean, stdev)
+
+    def pmf_table(self):
+        """Function to return the probability mass function for k = 0..n.
+
+        Args:
+            None
+
+        Returns:
+            array: pmf values, the value at index k is the probability of k
+        """
+        return self.pmf
+
+    def pdf(self, k):
+        """Probability mass function of the distribution.
+
+        Args:
+            k (int or array): points for calculating the probability mass function
+
+        Returns:
+            array: probability mass output, 0 outside of 0..n
+        """
+        k = np.asarray(k, dtype=float)
+        valid = (k >= 0) & (k <= self.n) & (k == np.floor(k))
+        idx = np.where(valid, k, 0).astype(np.int64)
+
+        return np.where(valid, self.pmf[idx], 0.0)
+
+    def logpdf(self, k):
+        """Natural logarithm of the probability mass function.
+
+        Args:
+            k (int or array): points for calculating the log probability
+
+        Returns:
+            array: log probability mass output, -inf outside of 0..n
+        """
+        with np.errstate(divide='ignore'):
+            return np.log(self.pdf(k))
+
+    # cdf and sf only rely on pmf_table and n
+    cdf = Binomial.cdf
+    sf = Binomial.sf
+    _lookup = Binomial._lookup
+
+    def sample(self, size=None, rng=None):
+        """Function to draw random values from the distribution.
+
+        Args:
+            size (int or tuple): number or shape of values, None for one value
+            rng (int or Generator): seed or numpy random generator
+
+        Returns:
+            int or array: random values
+        """
+        return np.random.default_rng(rng).choice(self.n + 1, size=size, p=self.pmf)
+
+    def __add__(self, other):
+        """Function to add a discrete or binomial distribution by
+        convolving the probability mass functions
+
+        Args:
+            other (Discrete or Binomial): distribution instance
+
+        Returns:
+            Discrete: distribution of the sum
+
+        """
+        from .Convolution import sum_distributions
+
+        return sum_distributions([self, other])
+
+    def __repr__(self):
+        """Function to output the characteristics of the Discrete instance
+
+        Args:
+            None
+
+        Returns:
+            string: characteristics of the Discrete object
+
+        """
+        return 'mean {}, standard deviation {}, n {}'.format(
+            self.mean, self.stdev, self.n
+        )
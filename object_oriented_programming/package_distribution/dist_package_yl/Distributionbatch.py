@@ -0,0 +1,180 @@
+
+import numpy as np
+from .Gaussiandistribution import Gaussian
+from .Binomialdistribution import Binomial
+
+
+class DistributionBatch:
+    """ Columnar collection of distributions of one family. The parameters
+    are stored as parallel numpy arrays instead of one object per
+    distribution, and mean, stdev, pdf and add work on all of them at once.
+
+    Arguments of pdf and related methods are broadcast against the
+    parameter arrays: a scalar or an array of length len(batch) gives one
+    value per distribution, and x[:, None] evaluates a grid of points for
+    every distribution.
+
+    """
+
+    # scalar class returned when a single distribution is selected
+    distribution = None
+
+    # names of the parameter arrays, in the order of the constructor
+    parameters = ()
+
+    def __len__(self):
+
+        return len(getattr(self, self.parameters[0]))
+
+    def __getitem__(self, index):
+
+        """Function to select distributions from the batch
+
+        Args:
+            index (int, slice or array): distributions to select
+
+        Returns:
+            Distribution: for an integer index
+            DistributionBatch: for a slice or an index array
+
+        """
+
+        values = [getattr(self, name)[index] for name in self.parameters]
+
+        if np.ndim(values[0]) == 0:
+            return self.distribution(*[value.item() for value in values])
+
+        return type(self)(*values)
+
+    @classmethod
+    def from_distributions(cls, distributions):
+
+        """Function to build a batch from a list of distribution objects
+
+        Args:
+            distributions (list): Gaussian or Binomial instances
+
+        Returns:
+            DistributionBatch: batch holding their parameters
+
+        """
+
+        columns = [[getattr(d, name) for d in distributions] for name in cls.parameters]
+
+        return cls(*columns)
+
+    def to_list(self):
+
+        """Function to expand the batch into distribution objects
+
+        Args:
+            None
+
+        Returns:
+            list: Gaussian or Binomial instances
+
+        """
+
+        return [self[i] for i in range(len(self))]
+
+    def __repr__(self):
+
+        """Function to output the characteristics of the batch
+
+        Args:
+            None
+
+        Returns:
+            string: characteristics of the batch
+
+        """
+
+        return '{} of {} distributions'.format(type(self).__name__, len(self))
+
+
+class GaussianBatch(DistributionBatch):
+    """ Batch of Gaussian distributions.
+
+    Attributes:
+        mean (array) mean value of each distribution
+        stdev (array) standard deviation of each distribution
+
+    """
+
+    distribution = Gaussian
+    parameters = ('mean', 'stdev')
+
+    def __init__(self, mu, sigma):
+
+        self.mean = np.asarray(mu, dtype=float)
+        self.stdev = np.asarray(sigma, dtype=float)
+
+    # the Gaussian formulas are written with numpy and broadcast over
+    # the parameter arrays, so the batch shares them
+    pdf = Gaussian.pdf
+    logpdf = Gaussian.logpdf
+    cdf = Gaussian.cdf
+    sf = Gaussian.sf
+
+    def __add__(self, other):
+
+        """Function to add two batches of Gaussian distributions elementwise
+
+        Args:
+            other (GaussianBatch): batch of the same length
+
+        Returns:
+            GaussianBatch: batch of the sums
+
+        """
+
+        return GaussianBatch(self.mean + other.mean,
+                             np.sqrt(self.stdev ** 2 + other.stdev ** 2))
+
+
+class BinomialBatch(DistributionBatch):
+    """ Batch of Binomial distributions.
+
+    Attributes:
+        p (array) probability of an event occurring for each distribution
+        n (array) number of trials of each distribution
+
+    """
+
+    distribution = Binomial
+    parameters = ('p', 'n')
+
+    def __init__(self, p, n):
+
+        self.p = np.asarray(p, dtype=float)
+        self.n = np.asarray(n, dtype=np.int64)
+
+    pdf = Binomial.pdf
+    logpdf = Binomial.logpdf
+
+    @property
+    def mean(self):
+        """Mean of each distribution."""
+        return self.n * self.p
+
+    @property
+    def stdev(self):
+        """Standard deviation of each distribution."""
+        return np.sqrt(self.n * self.p * (1 - self.p))
+
+    def __add__(self, other):
+
+        """Function to add two batches of Binomial distributions elementwise.
+        Every pair must have equal p.
+
+        Args:
+            other (BinomialBatch): batch of the same length
+
+        Returns:
+            BinomialBatch: batch of the sums
+
+        """
+
+        assert np.all(self.p == other.p), 'p values are not equal'
+
+        return BinomialBatch(self.p, self.n + other.n)
@@ -1,7 +1,8 @@
 
 import math
-import matplotlib.pyplot as plt
+import numpy as np
 from .Generaldistribution import Distribution
+from .Specialfunctions import erfc
 
 class Gaussian(Distribution):
 	""" Gaussian distribution class for calculating and 
@@ -13,6 +14,8 @@ class Gaussian(Distribution):
 		data_list (list of floats) a list of floats extracted from the data file
 			
 	"""
+	__slots__ = ()
+
 	def __init__(self, mu=0, sigma=1):
 		
 		Distribution.__init__(self, mu, sigma)
@@ -20,7 +23,9 @@ class Gaussian(Distribution):
 	
 	def calculate_mean(self):
 	
-		"""Function to calculate the mean of the data set.
+		"""Function to calculate the mean of the data set. The mean and the
+		standard deviation come from one cached pass over the data, see
+		calculate_stdev.
 		
 		Args: 
 			None
@@ -30,7 +35,7 @@ class Gaussian(Distribution):
 	
 		"""
 					
-		avg = 1.0 * sum(self.data) / len(self.data)
+		avg = self.summarize_data().mean
 		
 		self.mean = avg
 		
@@ -41,6 +46,8 @@ class Gaussian(Distribution):
 	def calculate_stdev(self, sample=True):
 
 		"""Function to calculate the standard deviation of the data set.
+		The data is reduced once in chunks, each chunk with a compensated
+		two-pass sum, and the result is cached until the data changes.
 		
 		Args: 
 			sample (bool): whether the data represents a sample or population
@@ -50,52 +57,14 @@ class Gaussian(Distribution):
 	
 		"""
 
-		if sample:
-			n = len(self.data) - 1
-		else:
-			n = len(self.data)
-	
-		mean = self.mean
-	
-		sigma = 0
-	
-		for d in self.data:
-			sigma += (d - mean) ** 2
+		summary = self.summarize_data()
 		
-		sigma = math.sqrt(sigma / n)
-	
-		self.stdev = sigma
+		self.mean = summary.mean
+		self.stdev = summary.stdev(sample)
 		
 		return self.stdev
 		
 
-	def read_data_file(self, file_name, sample=True):
-	
-		"""Function to read in data from a txt file. The txt file should have
-		one number (float) per line. The numbers are stored in the data attribute. 
-		After reading in the file, the mean and standard deviation are calculated
-				
-		Args:
-			file_name (string): name of a file to read from
-		
-		Returns:
-			None
-		
-		"""
-			
-		with open(file_name) as file:
-			data_list = []
-			line = file.readline()
-			while line:
-				data_list.append(int(line))
-				line = file.readline()
-		file.close()
-	
-		self.data = data_list
-		self.mean = self.calculate_mean()
-		self.stdev = self.calculate_stdev(sample)
-		
-		
 	def plot_histogram(self):
 		"""Function to output a histogram of the instance variable data using 
 		matplotlib pyplot library.
@@ -106,7 +75,10 @@ class Gaussian(Distribution):
 		Returns:
 			None
 		"""
-		plt.hist(self.data)
+		import matplotlib.pyplot as plt
+
+		hist = self.get_histogram()
+		plt.bar(hist.edges[:-1], hist.counts, width=hist.widths, align='edge')
 		plt.title('Histogram of Data')
 		plt.xlabel('data')
 		plt.ylabel('count')
@@ -117,14 +89,74 @@ class Gaussian(Distribution):
 		"""Probability density function calculator for the gaussian distribution.
 		
 		Args:
-			x (float): point for calculating the probability density function
+			x (float or array): points for calculating the probability density function
 			
 		
 		Returns:
-			float: probability density function output
+			array: probability density function output
+		"""
+		
+		return np.exp(self.logpdf(x))
+		
+
+	def logpdf(self, x):
+		"""Natural logarithm of the probability density function.
+		
+		Args:
+			x (float or array): points for calculating the log density
+		
+		Returns:
+			array: log probability density function output
+		"""
+		
+		z = (np.asarray(x, dtype=float) - self.mean) / self.stdev
+		
+		return -0.5 * z * z - np.log(self.stdev * math.sqrt(2 * math.pi))
+		
+
+	def cdf(self, x):
+		"""Cumulative distribution function of the gaussian distribution.
+		
+		Args:
+			x (float or array): points for calculating the cdf
+		
+		Returns:
+			array: probability of a value less than or equal to x
 		"""
 		
-		return (1.0 / (self.stdev * math.sqrt(2*math.pi))) * math.exp(-0.5*((x - self.mean) / self.stdev) ** 2)
+		z = (np.asarray(x, dtype=float) - self.mean) / self.stdev
+		
+		return 0.5 * erfc(-z / math.sqrt(2))
+		
+
+	def sf(self, x):
+		"""Survival function (1 - cdf) of the gaussian distribution. It is
+		computed directly so the upper tail keeps its precision.
+		
+		Args:
+			x (float or array): points for calculating the survival function
+		
+		Returns:
+			array: probability of a value greater than x
+		"""
+		
+		z = (np.asarray(x, dtype=float) - self.mean) / self.stdev
+		
+		return 0.5 * erfc(z / math.sqrt(2))
+		
+
+	def sample(self, size=None, rng=None):
+		"""Function to draw random values from the gaussian distribution.
+		
+		Args:
+			size (int or tuple): number or shape of values, None for one value
+			rng (int or Generator): seed or numpy random generator
+		
+		Returns:
+			float or array: random values
+		"""
+		
+		return np.random.default_rng(rng).normal(self.mean, self.stdev, size)
 		
 
 	def plot_histogram_pdf(self, n_spaces = 50):
@@ -136,33 +168,31 @@ class Gaussian(Distribution):
 			n_spaces (int): number of data points 
 		
 		Returns:
-			list: x values for the pdf plot
-			list: y values for the pdf plot
+			array: x values for the pdf plot
+			array: y values for the pdf plot
 			
 		"""
+		import matplotlib.pyplot as plt
 		
 		mu = self.mean
 		sigma = self.stdev
 
-		min_range = min(self.data)
-		max_range = max(self.data)
+		hist = self.get_histogram()
+
+		min_range = hist.edges[0]
+		max_range = hist.edges[-1]
 		
 		 # calculates the interval between x values
 		interval = 1.0 * (max_range - min_range) / n_spaces
 
-		x = []
-		y = []
-		
 		# calculate the x values to visualize
-		for i in range(n_spaces):
-			tmp = min_range + interval*i
-			x.append(tmp)
-			y.append(self.pdf(tmp))
+		x = min_range + interval * np.arange(n_spaces)
+		y = self.pdf(x)
 
 		# make the plots
 		fig, axes = plt.subplots(2,sharex=True)
 		fig.subplots_adjust(hspace=.5)
-		axes[0].hist(self.data, density=True)
+		axes[0].bar(hist.edges[:-1], hist.density(), width=hist.widths, align='edge')
 		axes[0].set_title('Normed Histogram of Data')
 		axes[0].set_ylabel('Density')
 
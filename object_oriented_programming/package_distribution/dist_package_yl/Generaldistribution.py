@@ -1,6 +1,77 @@
 
+import copy
+from itertools import islice
+import numpy as np
+from .Summarystatistics import SummaryStatistics, SlidingWindow
+
+# number of values processed at a time by the array based readers
+CHUNK_SIZE = 1 << 20
+
+
+def iter_chunks(data, chunksize=CHUNK_SIZE):
+
+	"""
+	Function to walk over a list or array in fixed size chunks. Slices of
+	numpy and memory-mapped arrays are views, so no copy of the full data
+	set is made.
+
+	Args:
+		data (list or array): values to walk over
+		chunksize (int): number of values per chunk
+
+	Returns:
+		generator: numpy arrays of at most chunksize values
+
+	"""
+
+	for start in range(0, len(data), chunksize):
+		yield np.asarray(data[start:start + chunksize])
+
+
+def _sample_block(dist, out, start, stop, seed):
+
+	"""
+	Function to fill out[start:stop] with draws from dist. A memory-mapped
+	output is passed as (file name, dtype, offset, size) and opened again,
+	so the block can be filled from another process.
+
+	Args:
+		dist (Distribution): distribution to sample from
+		out (array or tuple): output buffer or description of a mapped file
+		start (int): first index of the block
+		stop (int): index after the last one of the block
+		seed (SeedSequence): seed of the block's random stream
+
+	Returns:
+		None
+
+	"""
+
+	if isinstance(out, tuple):
+		file_name, dtype, offset, size = out
+		out = np.memmap(file_name, dtype=dtype, mode='r+', offset=offset, shape=(size,))
+
+	out[start:stop] = dist.sample(stop - start, np.random.default_rng(seed))
+
+	if isinstance(out, np.memmap):
+		out.flush()
+
+
 class Distribution:
 
+	# no per instance __dict__, many small objects stay compact
+	__slots__ = ('mean', 'stdev', 'summary', 'window', 'histogram', '_data')
+
+	# dtype used by read_binary_file when none is given
+	binary_dtype = 'float64'
+
+	# mergeable summary accumulated by the data readers
+	summary_class = SummaryStatistics
+
+	# dtype of the values returned by sample
+	sample_dtype = 'float64'
+
+
 	def __init__(self, mu = 0, sigma = 1):
 
 		""" 
@@ -11,35 +82,501 @@ class Distribution:
 			mean (float) representing the mean value of the distribution
 			stdev (float) representing the standard deviation of the distribution
 			data_list (list of floats) a list of floats extracted from the data file
+			summary (summary_class) summary of the data read from a file
+			window (SlidingWindow) recent values in sliding window mode
+			histogram (Histogram) cached bins of the data
 		
 		"""
 
 		self.mean = mu
 		self.stdev = sigma
-		self.data = []
+		self.summary = None
+		self.window = None
+		self.histogram = None
+
+
+	@property
+	def data(self):
+
+		"""
+		Data set of the distribution. The empty list is only created the
+		first time the data is used. Assigning a new data set drops the
+		cached summary and histogram, so they are only recomputed after the
+		data changes.
+		Lists changed in place should be assigned again to refresh it.
+		
+		"""
+
+		try:
+			return self._data
+		except AttributeError:
+			self._data = []
+			return self._data
+
+	@data.setter
+	def data(self, values):
+
+		self._data = values
+		self.summary = None
+		self.histogram = None
+
+	def summarize_data(self):
+
+		"""
+		Function to describe the data attribute in one chunked pass and
+		cache the result in the summary attribute. Later calls return the
+		cached summary until the data is replaced.
+				
+		Args:
+			None
+		
+		Returns:
+			summary_class: summary of the data set
+		
+		"""
+
+		if self.summary is None:
+			summary = self.summary_class()
+
+			for chunk in iter_chunks(self.data):
+				summary.update_batch(chunk)
+
+			self.summary = summary
+
+		return self.summary
+
+	def get_histogram(self, bins=None, adaptive=False):
+
+		"""
+		Function to return the histogram of the values the distribution is
+		fitted to: the data attribute, or the window in sliding window mode.
+		It is built in one chunked pass, cached in the histogram attribute
+		and kept up to date by update and remove, so plots do not go over the
+		raw data again. A histogram assigned to the attribute, e.g. one
+		loaded from a file, is used even without data.
+				
+		Args:
+			bins (int): number of bins, the cached histogram is rebuilt if it
+				has a different number, defaults to the cached one or 10
+			adaptive (bool): whether to use equal count instead of equal width bins
+		
+		Returns:
+			Histogram: histogram of the data
+		
+		"""
+
+		from .Histogram import Histogram
+
+		cached = self.histogram
+		if cached is not None and (bins is None or len(cached.counts) == bins):
+			return cached
+
+		if self.window is not None:
+			values = self.window.values()
+			summary = self.window.summary
+		else:
+			values = self.data
+			summary = self.summarize_data()
+
+		# batches passed to update are only in the histogram, not in the data
+		if cached is not None and cached.total != len(values):
+			raise ValueError('the histogram holds values that are not in the data attribute, '
+				'it cannot be rebuilt with {} bins'.format(bins))
+
+		value_range = None
+		if isinstance(summary, SummaryStatistics) and summary.count:
+			value_range = (summary.min, summary.max)
 
-	def read_data_file(self, file_name):
+		self.histogram = Histogram.from_data(values, bins or 10, value_range, adaptive)
+
+		return self.histogram
+
+	def read_data_file(self, file_name, sample=True, keep_data=True):
 
 		"""
 		Function to read in data from a txt file. The txt file should have
-		one number (float) per line. The numbers are stored in the data attribute.
+		one number (float) per line. The file is streamed once: the mean,
+		standard deviation, minimum, maximum and count are accumulated while
+		reading, so the raw numbers only need to be stored in the data
+		attribute when keep_data is True.
 				
 		Args:
 			file_name (string): name of a file to read from
+			sample (bool): whether the data represents a sample or population
+			keep_data (bool): whether to store the numbers in the data attribute
 		
 		Returns:
 			None
 		
 		"""
 
+		summary = self.summary_class()
+		data_list = []
+
 		with open(file_name) as file:
-			data_list = []
-			line = file.readline()
+			for line in file:
+				line = line.strip()
+				if not line:
+					continue
+
+				value = float(line)
+				summary.update(value)
+
+				if keep_data:
+					data_list.append(value)
+
+		self.data = data_list
+		self.fit_summary(summary, sample)
+
+	def read_npy_file(self, file_name, sample=True, mmap=True):
+
+		"""
+		Function to read in data from a .npy file. By default the file is
+		memory-mapped, so the data attribute is backed by the file and only
+		the pages that are touched are loaded.
+				
+		Args:
+			file_name (string): name of a .npy file to read from
+			sample (bool): whether the data represents a sample or population
+			mmap (bool): whether to memory-map the file instead of loading it
+		
+		Returns:
+			None
+		
+		"""
+
+		data = np.load(file_name, mmap_mode='r' if mmap else None)
+		self._fit_array(data.reshape(-1), sample)
+
+	def read_binary_file(self, file_name, dtype=None, sample=True):
+
+		"""
+		Function to memory-map a raw binary file of numbers, for example
+		one written with numpy's tofile.
+				
+		Args:
+			file_name (string): name of a binary file to read from
+			dtype (string): type of the stored numbers, defaults to binary_dtype
+			sample (bool): whether the data represents a sample or population
+		
+		Returns:
+			None
+		
+		"""
+
+		data = np.memmap(file_name, dtype=dtype or self.binary_dtype, mode='r')
+		self._fit_array(data, sample)
+
+	def read_csv_column(self, file_name, column=0, delimiter=',', skip_header=0,
+			chunksize=CHUNK_SIZE, sample=True, cache_file=None):
+
+		"""
+		Function to read one column of a csv file in chunks of rows. Each
+		chunk is parsed with numpy and folded into the summary. If cache_file
+		is given the parsed values are written there as raw binary and the
+		data attribute memory-maps it, otherwise they are kept in memory.
+				
+		Args:
+			file_name (string): name of a csv file to read from
+			column (int): index of the column to read
+			delimiter (string): column separator
+			skip_header (int): number of lines to skip at the top of the file
+			chunksize (int): number of rows parsed at a time
+			sample (bool): whether the data represents a sample or population
+			cache_file (string): optional binary file to store the parsed column
+		
+		Returns:
+			None
+		
+		"""
+
+		summary = self.summary_class()
+		chunks = []
+		cache = open(cache_file, 'wb') if cache_file else None
+
+		try:
+			with open(file_name) as file:
+				for _ in islice(file, skip_header):
+					pass
+
+				while True:
+					lines = list(islice(file, chunksize))
+					if not lines:
+						break
+
+					values = np.loadtxt(lines, delimiter=delimiter, usecols=column,
+						dtype=self.binary_dtype, ndmin=1)
+					summary.update_batch(values)
+
+					if cache:
+						values.tofile(cache)
+					else:
+						chunks.append(values)
+		finally:
+			if cache:
+				cache.close()
+
+		if cache_file:
+			if summary.count:
+				self.data = np.memmap(cache_file, dtype=self.binary_dtype, mode='r')
+			else:
+				self.data = np.empty(0, dtype=self.binary_dtype)
+		else:
+			self.data = np.concatenate(chunks) if chunks else np.empty(0, dtype=self.binary_dtype)
+
+		self.fit_summary(summary, sample)
+
+	def _fit_array(self, data, sample=True):
+
+		"""
+		Function to store an array as the data attribute and fit the
+		distribution to it with one chunked pass.
+				
+		Args:
+			data (array): values to store
+			sample (bool): whether the data represents a sample or population
+		
+		Returns:
+			None
+		
+		"""
+
+		self.data = data
+		self.fit_summary(self.summarize_data(), sample)
+
+	def update(self, batch, sample=True):
+
+		"""
+		Function to fold new observations into the fitted parameters in time
+		proportional to the batch. The observations are not added to the data
+		attribute, so the histogram is built first (one pass over the data,
+		only at the first update) and the batch is added to it. In sliding
+		window mode the oldest values leave the fit.
+				
+		Args:
+			batch (list or array): new observations
+			sample (bool): whether the data represents a sample or population
+		
+		Returns:
+			None
+		
+		"""
+
+		self.get_histogram()
+
+		if self.window is not None:
+			evicted = self.window.push(batch)
+			self.fit_summary(self.window.summary, sample)
+		else:
+			evicted = None
+			summary = self.summarize_data()
+			summary.update_batch(batch)
+			self.fit_summary(summary, sample)
+
+		self.histogram.update(batch)
+		if evicted is not None:
+			self.histogram.remove(evicted)
+
+	def remove(self, batch, sample=True):
+
+		"""
+		Function to take observations that were part of the fit out of the
+		fitted parameters in time proportional to the batch. The histogram is
+		built first if needed, as the data attribute keeps the observations.
+				
+		Args:
+			batch (list or array): observations to remove
+			sample (bool): whether the data represents a sample or population
+		
+		Returns:
+			None
+		
+		"""
+
+		if self.window is not None:
+			raise ValueError('values leave a sliding window on their own, remove is not supported')
+
+		self.get_histogram()
+
+		summary = self.summarize_data()
+		summary.remove_batch(batch)
+		self.fit_summary(summary, sample)
+
+		self.histogram.remove(batch)
+
+	def set_window(self, size, sample=True):
+
+		"""
+		Function to switch to sliding window mode, where the fit only covers
+		the last size observations passed to update. The window starts with
+		the end of the current data. A size of None leaves the mode.
+				
+		Args:
+			size (int): number of observations in the window, or None
+			sample (bool): whether the data represents a sample or population
+		
+		Returns:
+			None
+		
+		"""
+
+		if size is None:
+			self.window = None
+			return
+
+		self.window = SlidingWindow(size, self.summary_class)
+		self.window.push(np.asarray(self.data[-size:]))
+		self.histogram = None
+
+		if self.window.count:
+			self.fit_summary(self.window.summary, sample)
+
+	def fit(self, data=None, method='mle', weights=None):
+
+		"""
+		Function to fit the distribution to a data set. Grouped or binned data
+		can be given as values with their counts in weights, so a histogram is
+		fitted in time proportional to the number of bins. The data attribute
+		is left unchanged.
+				
+		Args:
+			data (list or array): values to fit, defaults to the data attribute
+			method (string): 'mle' for maximum likelihood, 'moments' for the
+				method of moments with the sample correction of calculate_stdev
+			weights (array): optional count or weight of each value
+		
+		Returns:
+			None
+		
+		"""
+
+		if method not in ('mle', 'moments'):
+			raise ValueError("method must be 'mle' or 'moments'")
+
+		if data is None and weights is None:
+			summary = self.summarize_data()
+		else:
+			data = self.data if data is None else data
+			summary = self.summary_class.from_array(data, weights)
+
+		self.fit_summary(summary, sample=(method == 'moments'))
+
+	def loglikelihood(self, data=None, weights=None):
+
+		"""
+		Function to calculate the total log-likelihood of a data set under
+		the distribution, evaluated with vectorized log densities in chunks.
+				
+		Args:
+			data (list or array): values, defaults to the data attribute
+			weights (array): optional count or weight of each value
+		
+		Returns:
+			float: sum of the weighted log densities
+		
+		"""
+
+		data = self.data if data is None else data
+		total = 0.0
+
+		if weights is None:
+			for chunk in iter_chunks(data):
+				total += float(np.sum(self._data_logpdf(chunk)))
+		else:
+			for chunk, weight in zip(iter_chunks(data), iter_chunks(weights)):
+				# zero weights must not turn a -inf density into nan
+				keep = weight != 0
+				total += float(np.sum(weight[keep] * self._data_logpdf(chunk[keep])))
+
+		return total
+
+	def _data_logpdf(self, values):
+
+		"""
+		Function to calculate the log density of single observations.
+				
+		Args:
+			values (array): observations
+		
+		Returns:
+			array: log density of each observation
+		
+		"""
+
+		return self.logpdf(values)
+
+	def fit_summary(self, summary, sample=True):
+
+		"""
+		Function to update the mean and standard deviation from a summary
+		of a data set.
+				
+		Args:
+			summary (summary_class): summary of the data set
+			sample (bool): whether the data represents a sample or population
+		
+		Returns:
+			None
+		
+		"""
+
+		self.summary = summary
+		self.mean = summary.mean
+		self.stdev = summary.stdev(sample)
+
+	def sample_parallel(self, size=None, out=None, seed=None, workers=None,
+			chunksize=CHUNK_SIZE):
+
+		"""
+		Function to draw a large number of random values into one buffer.
+		The buffer is split into blocks of chunksize values and every block
+		gets its own independent stream spawned from seed, so the result only
+		depends on seed and chunksize, not on the number of workers. Blocks
+		of a memory-mapped buffer are filled by worker processes, blocks of
+		an in-memory array by threads.
+				
+		Args:
+			size (int): number of values, not needed when out is an array
+			out (array, memmap or string): buffer to fill, or the name of a
+				file to create as a memory-mapped buffer
+			seed (int or SeedSequence): seed of the random streams
+			workers (int): number of workers, defaults to all cores
+			chunksize (int): number of values per block
+		
+		Returns:
+			array: the filled buffer
+		
+		"""
+
+		# process pools are costly to import, only load them when used
+		from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+		if out is None:
+			out = np.empty(size, dtype=self.sample_dtype)
+		elif isinstance(out, str):
+			out = np.memmap(out, dtype=self.sample_dtype, mode='w+', shape=(size,))
+
+		size = len(out)
+		starts = range(0, size, chunksize)
+		seeds = np.random.SeedSequence(seed).spawn(len(starts))
+
+		# workers only need the parameters, not the data set
+		dist = copy.copy(self)
+		dist.data = []
 
-			while line:
-				data_list.append(int(line))
-				line = file.readline()
+		if isinstance(out, np.memmap) and out.filename:
+			out.flush()
+			target = (out.filename, out.dtype.str, out.offset, size)
+			executor = ProcessPoolExecutor
+		else:
+			target = out
+			executor = ThreadPoolExecutor
 
-		file.close()
+		with executor(max_workers=workers) as pool:
+			futures = [pool.submit(_sample_block, dist, target, start,
+				min(start + chunksize, size), block_seed)
+				for start, block_seed in zip(starts, seeds)]
+			for future in futures:
+				future.result()
 
-		self.data = data_list
\ No newline at end of file
+		return out
@@ -0,0 +1,248 @@
+
+import numpy as np
+from .Generaldistribution import iter_chunks
+
+# resolution of the fine grid that adaptive bins are merged from
+ADAPTIVE_RESOLUTION = 32
+
+
+class Histogram:
+    """ Binned counts of a data set. Once built, plots and density queries
+    only need the bins, so they cost the same for 10^3 or 10^9 values, and
+    the bins can be stored and rendered without the raw data.
+
+    Attributes:
+        edges (array) bin edges, one more than the number of bins
+        counts (array) number of values in each bin
+
+    """
+
+    def __init__(self, edges, counts=None):
+
+        self.edges = np.asarray(edges, dtype=float)
+        if counts is None:
+            counts = np.zeros(len(self.edges) - 1)
+        self.counts = np.asarray(counts, dtype=float)
+
+    @classmethod
+    def from_data(cls, data, bins=10, range=None, adaptive=False):
+        """Function to build the histogram of a data set in one chunked pass.
+
+        Adaptive bins hold roughly equal numbers of values. They are merged
+        from a fine grid of equal width bins, so no second pass is needed.
+
+        Args:
+            data (list or array): values to count
+            bins (int): number of bins
+            range (tuple): lower and upper edge, defaults to the data range
+            adaptive (bool): whether to use equal count instead of equal width bins
+
+        Returns:
+            Histogram: histogram of the data
+
+        """
+        if range is None:
+            low, high = np.inf, -np.inf
+            for chunk in iter_chunks(data):
+                if chunk.size:
+                    low = min(low, float(chunk.min()))
+                    high = max(high, float(chunk.max()))
+            range = (low, high) if low <= high else (0.0, 1.0)
+
+        low, high = range
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        # bins are half open, the top edge lies just above the largest value
+        high = np.nextafter(high, np.inf)
+
+        fine = bins * ADAPTIVE_RESOLUTION if adaptive else bins
+        hist = cls(np.linspace(low, high, fine + 1))
+        hist.update(data)
+
+        if adaptive:
+            hist = hist.merged(bins)
+
+        return hist
+
+    def merged(self, bins):
+        """Function to merge neighbouring bins into about equal count bins.
+
+        Args:
+            bins (int): number of bins wanted
+
+        Returns:
+            Histogram: histogram with the merged bins
+
+        """
+        cumulative = np.concatenate([[0.0], np.cumsum(self.counts)])
+        targets = cumulative[-1] * np.arange(1, bins) / bins
+        cuts = np.searchsorted(cumulative, targets)
+        cuts = np.unique(np.concatenate([[0], cuts, [len(self.counts)]]))
+
+        return Histogram(self.edges[cuts], np.diff(cumulative[cuts]))
+
+    def update(self, values):
+        """Function to add values to the counts. An empty histogram takes the
+        range of the first values. Values outside of the edges extend the
+        range (see extend), so no bin is stretched over them.
+
+        Args:
+            values (list or array): values to add
+
+        Returns:
+            None
+
+        """
+        for chunk in iter_chunks(values):
+            if chunk.size == 0:
+                continue
+            low, high = float(chunk.min()), float(chunk.max())
+            bins = len(self.counts)
+
+            if self.total == 0:
+                if low == high:
+                    low, high = low - 0.5, high + 0.5
+                self.edges = np.linspace(low, np.nextafter(high, np.inf), bins + 1)
+            else:
+                self.extend(low, high)
+
+            self.counts += np.histogram(chunk, self.edges)[0]
+
+            # unequal bins got new outer bins, merge back to the same number
+            if len(self.counts) > bins:
+                merged = self.merged(bins)
+                self.edges, self.counts = merged.edges, merged.counts
+
+    def extend(self, low, high):
+        """Function to extend the edges to cover low and high. Equal width
+        bins are doubled in width, by merging neighbouring pairs after adding
+        as many empty bins on the side of the new values, until the range is
+        covered, so the number of bins stays the same and every counted value
+        stays in a bin that holds it. Unequal (adaptive) bins get a new outer
+        bin on each side instead. Bins are half open [left, right): the top
+        edge is moved just above high, so no value sits on the top edge,
+        which np.histogram would count in the last bin.
+
+        Args:
+            low (float): lowest value to cover
+            high (float): highest value to cover
+
+        Returns:
+            None
+
+        """
+        widths = self.widths
+        if not np.allclose(widths, widths[0]):
+            if low < self.edges[0]:
+                self.edges = np.concatenate([[low], self.edges])
+                self.counts = np.concatenate([[0.0], self.counts])
+            if high >= self.edges[-1]:
+                self.edges = np.concatenate([self.edges, [np.nextafter(high, np.inf)]])
+                self.counts = np.concatenate([self.counts, [0.0]])
+            return
+
+        bins = len(self.counts)
+        while low < self.edges[0] or high >= self.edges[-1]:
+            width = self.edges[1] - self.edges[0]
+            steps = width * np.arange(1, bins + 1)
+            empty = np.zeros(bins)
+            if low < self.edges[0]:
+                self.edges = np.concatenate([self.edges[0] - steps[::-1], self.edges])
+                self.counts = np.concatenate([empty, self.counts])
+            else:
+                self.edges = np.concatenate([self.edges, self.edges[-1] + steps])
+                self.counts = np.concatenate([self.counts, empty])
+            self.edges = self.edges[::2]
+            self.counts = self.counts.reshape(-1, 2).sum(axis=1)
+
+    def remove(self, values):
+        """Function to take values that were added before out of the counts.
+
+        Args:
+            values (list or array): values to remove
+
+        Returns:
+            None
+
+        """
+        for chunk in iter_chunks(values):
+            self.counts -= np.histogram(chunk, self.edges)[0]
+        np.maximum(self.counts, 0, out=self.counts)
+
+    @property
+    def total(self):
+        """Number of values counted."""
+        return float(self.counts.sum())
+
+    @property
+    def widths(self):
+        """Width of each bin."""
+        return np.diff(self.edges)
+
+    def density(self):
+        """Function to normalize the counts so the histogram integrates to one.
+
+        Args:
+            None
+
+        Returns:
+            array: density of each bin
+        """
+        total = self.total
+
+        if total == 0:
+            return np.zeros_like(self.counts)
+
+        return self.counts / (total * self.widths)
+
+    def pdf(self, x):
+        """Function to read the histogram density at the points x.
+
+        Args:
+            x (float or array): points to evaluate
+
+        Returns:
+            array: density of the bin that holds x, 0 outside of the edges
+        """
+        x = np.asarray(x, dtype=float)
+        idx = np.clip(np.searchsorted(self.edges, x, side='right') - 1, 0, len(self.counts) - 1)
+        inside = (x >= self.edges[0]) & (x <= self.edges[-1])
+
+        return np.where(inside, self.density()[idx], 0.0)
+
+    def to_dict(self):
+        """Function to convert the histogram to plain lists, e.g. for JSON.
+
+        Args:
+            None
+
+        Returns:
+            dict: edges and counts
+        """
+        return {'edges': self.edges.tolist(), 'counts': self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, values):
+        """Function to rebuild a histogram from the output of to_dict.
+
+        Args:
+            values (dict): edges and counts
+
+        Returns:
+            Histogram: histogram
+        """
+        return cls(values['edges'], values['counts'])
+
+    def __repr__(self):
+        """Function to output the characteristics of the histogram
+
+        Args:
+            None
+
+        Returns:
+            string: characteristics of the histogram
+
+        """
+        return 'histogram of {} values in {} bins from {} to {}'.format(
+            self.total, len(self.counts), self.edges[0], self.edges[-1]
+        )
@@ -0,0 +1,67 @@
+
+import os
+from .Gaussiandistribution import Gaussian
+
+
+def summarize_file(distribution, file_name, reader='read_data_file', **kwargs):
+    """Function to read one file with a distribution's reader and return
+    the summary of its data. It is a module level function so it can be
+    sent to worker processes.
+
+    Args:
+        distribution (class): Gaussian or Binomial
+        file_name (string): name of the file to read
+        reader (string): name of the reader method, e.g. read_npy_file
+        **kwargs: extra arguments passed to the reader
+
+    Returns:
+        summary_class: mergeable summary of the file
+    """
+    if reader == 'read_data_file':
+        kwargs.setdefault('keep_data', False)
+
+    dist = distribution()
+    getattr(dist, reader)(file_name, **kwargs)
+
+    return dist.summary
+
+
+def fit_parallel(files, distribution=Gaussian, workers=None, sample=True,
+                 reader='read_data_file', **kwargs):
+    """Function to fit a distribution to data spread over several files.
+    Each file is summarized in a separate worker process and the summaries
+    are merged exactly, so the result matches reading all files into one
+    object.
+
+    Args:
+        files (list of strings): names of the files to read
+        distribution (class): Gaussian or Binomial
+        workers (int): number of worker processes, defaults to all cores
+        sample (bool): whether the data represents a sample or population
+        reader (string): name of the reader method used for every file
+        **kwargs: extra arguments passed to the reader
+
+    Returns:
+        Distribution: fitted instance of distribution
+    """
+    files = list(files)
+    workers = min(workers or os.cpu_count() or 1, len(files)) or 1
+
+    summary = distribution.summary_class()
+
+    if workers == 1:
+        for file_name in files:
+            summary.merge(summarize_file(distribution, file_name, reader, **kwargs))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(summarize_file, distribution, file_name, reader, **kwargs)
+                       for file_name in files]
+            for future in futures:
+                summary.merge(future.result())
+
+    result = distribution()
+    result.fit_summary(summary, sample)
+
+    return result
@@ -0,0 +1,230 @@
+
+import json
+import os
+import struct
+import numpy as np
+from .Gaussiandistribution import Gaussian
+from .Binomialdistribution import Binomial
+from .Discretedistribution import Discrete
+from .Distributionbatch import GaussianBatch, BinomialBatch
+from .Summarystatistics import SummaryStatistics, BinomialSummary
+from .Histogram import Histogram
+
+# version written into every file, files of newer versions are refused
+FORMAT_VERSION = 1
+
+# start of binary files, followed by the header length as uint32
+MAGIC = b'DISTYL\x00\x00'
+
+# arrays in binary files start at multiples of this many bytes
+ALIGNMENT = 64
+
+
+def _plain(value):
+    """Function to turn numpy scalars into Python numbers for the header."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _state(obj):
+    """Function to split an object into its kind, scalar fields and array
+    fields.
+
+    Args:
+        obj: Gaussian, Binomial, Discrete, GaussianBatch or BinomialBatch
+
+    Returns:
+        string: kind of the object
+        dict: scalar fields
+        dict: array fields
+    """
+    scalars = {}
+    arrays = {}
+
+    if isinstance(obj, GaussianBatch):
+        return 'GaussianBatch', scalars, {'mean': obj.mean, 'stdev': obj.stdev}
+    if isinstance(obj, BinomialBatch):
+        return 'BinomialBatch', scalars, {'p': obj.p, 'n': obj.n}
+
+    if isinstance(obj, Discrete):
+        kind = 'Discrete'
+        arrays['pmf'] = obj.pmf
+    elif isinstance(obj, Binomial):
+        kind = 'Binomial'
+        scalars.update(p=obj.p, n=obj.n)
+    elif isinstance(obj, Gaussian):
+        kind = 'Gaussian'
+    else:
+        raise TypeError('cannot serialize {}'.format(type(obj).__name__))
+
+    scalars.update(mean=obj.mean, stdev=obj.stdev)
+
+    summary = obj.summary
+    if isinstance(summary, SummaryStatistics) and summary.count:
+        scalars['summary'] = {'count': summary.count, 'mean': summary.mean, 'm2': summary.m2,
+                              'min': summary.min, 'max': summary.max}
+    elif isinstance(summary, BinomialSummary):
+        scalars['summary'] = {'trials': summary.trials, 'successes': summary.successes}
+
+    scalars = {name: {key: _plain(v) for key, v in value.items()} if isinstance(value, dict)
+               else _plain(value) for name, value in scalars.items()}
+
+    if obj.histogram is not None:
+        arrays['histogram_edges'] = obj.histogram.edges
+        arrays['histogram_counts'] = obj.histogram.counts
+
+    return kind, scalars, arrays
+
+
+def _build(kind, scalars, arrays, data=None):
+    """Function to rebuild an object from the output of _state.
+
+    Args:
+        kind (string): kind of the object
+        scalars (dict): scalar fields
+        arrays (dict): array fields
+        data (array): optional raw data
+
+    Returns:
+        the rebuilt object
+    """
+    if kind == 'GaussianBatch':
+        return GaussianBatch(arrays['mean'], arrays['stdev'])
+    if kind == 'BinomialBatch':
+        return BinomialBatch(arrays['p'], arrays['n'])
+
+    if kind == 'Discrete':
+        obj = Discrete(arrays['pmf'])
+    elif kind == 'Binomial':
+        obj = Binomial(scalars['p'], scalars['n'])
+    elif kind == 'Gaussian':
+        obj = Gaussian()
+    else:
+        raise ValueError('unknown kind {}'.format(kind))
+
+    if data is not None:
+        obj.data = data
+
+    obj.mean = scalars['mean']
+    obj.stdev = scalars['stdev']
+
+    fields = scalars.get('summary')
+    if fields is not None:
+        summary = obj.summary_class()
+        for name, value in fields.items():
+            setattr(summary, name, value)
+        obj.summary = summary
+
+    if 'histogram_edges' in arrays:
+        obj.histogram = Histogram(arrays['histogram_edges'], arrays['histogram_counts'])
+
+    return obj
+
+
+def _align(offset):
+
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save(obj, file_name, format='binary', include_data=False):
+    """Function to store a fitted distribution or a batch of distributions.
+
+    The binary format is a small JSON header followed by the raw arrays at
+    aligned offsets, so load can memory-map them without copying. The JSON
+    format stores the arrays as lists for other tools. With include_data,
+    the raw data is written next to the file as <file_name>.data.npy.
+
+    Args:
+        obj: Gaussian, Binomial, Discrete, GaussianBatch or BinomialBatch
+        file_name (string): name of the file to write
+        format (string): 'binary' or 'json'
+        include_data (bool): whether to write the data attribute as well
+
+    Returns:
+        None
+    """
+    kind, scalars, arrays = _state(obj)
+    arrays = {name: np.ascontiguousarray(value) for name, value in arrays.items()}
+
+    header = {'version': FORMAT_VERSION, 'kind': kind, 'scalars': scalars, 'data': None}
+
+    if include_data and not isinstance(obj, (GaussianBatch, BinomialBatch)):
+        sidecar = file_name + '.data.npy'
+        np.save(sidecar, np.asarray(obj.data))
+        header['data'] = os.path.basename(sidecar)
+
+    if format == 'json':
+        header['arrays'] = {name: value.tolist() for name, value in arrays.items()}
+        with open(file_name, 'w') as file:
+            json.dump(header, file)
+        return
+
+    if format != 'binary':
+        raise ValueError("format must be 'binary' or 'json'")
+
+    offset = 0
+    header['arrays'] = {}
+    for name, value in arrays.items():
+        header['arrays'][name] = {'dtype': value.dtype.str, 'shape': list(value.shape),
+                                  'offset': offset}
+        offset = _align(offset + value.nbytes)
+
+    encoded = json.dumps(header).encode('utf-8')
+    start = _align(len(MAGIC) + 4 + len(encoded))
+
+    with open(file_name, 'wb') as file:
+        file.write(MAGIC)
+        file.write(struct.pack('<I', len(encoded)))
+        file.write(encoded)
+        for name, value in arrays.items():
+            file.seek(start + header['arrays'][name]['offset'])
+            file.write(value.tobytes())
+
+
+def load(file_name, mmap=True):
+    """Function to read a file written by save.
+
+    Arrays of binary files are memory-mapped copy-on-write by default, so
+    loading does not depend on their size and changes stay in memory.
+
+    Args:
+        file_name (string): name of the file to read
+        mmap (bool): whether to memory-map arrays and data instead of reading them
+
+    Returns:
+        the stored distribution or batch
+    """
+    with open(file_name, 'rb') as file:
+        binary = file.read(len(MAGIC)) == MAGIC
+
+        if binary:
+            (length,) = struct.unpack('<I', file.read(4))
+            header = json.loads(file.read(length).decode('utf-8'))
+        else:
+            file.seek(0)
+            header = json.loads(file.read().decode('utf-8'))
+
+    if header['version'] > FORMAT_VERSION:
+        raise ValueError('file version {} is newer than the supported version {}'.format(
+            header['version'], FORMAT_VERSION))
+
+    if binary:
+        start = _align(len(MAGIC) + 4 + length)
+        arrays = {}
+        for name, info in header['arrays'].items():
+            shape = tuple(info['shape'])
+            if mmap and np.prod(shape) > 0:
+                arrays[name] = np.memmap(file_name, dtype=info['dtype'], mode='c',
+                                         offset=start + info['offset'], shape=shape)
+            else:
+                count = int(np.prod(shape))
+                arrays[name] = np.fromfile(file_name, dtype=info['dtype'], count=count,
+                                           offset=start + info['offset']).reshape(shape)
+    else:
+        arrays = {name: np.asarray(value) for name, value in header['arrays'].items()}
+
+    data = None
+    if header['data'] is not None:
+        sidecar = os.path.join(os.path.dirname(file_name), header['data'])
+        data = np.load(sidecar, mmap_mode='r' if mmap else None)
+
+    return _build(header['kind'], header['scalars'], arrays, data)
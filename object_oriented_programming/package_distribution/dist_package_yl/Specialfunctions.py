@@ -0,0 +1,126 @@
+
+import math
+import numpy as np
+
+
+# Rational approximations of the error function from the Cephes
+# library (ndtr.c). They are accurate to double precision and only need
+# numpy, so the distribution classes can evaluate them on whole arrays.
+_ERFC_P = [2.46196981473530512524E-10, 5.64189564831068821977E-1,
+           7.46321056442269912687E0, 4.86371970985681366614E1,
+           1.96520832956077098242E2, 5.26445194995477358631E2,
+           9.34528527171957607540E2, 1.02755188689515710272E3,
+           5.57535335369399327526E2]
+_ERFC_Q = [1.0, 1.32281951154744992508E1, 8.67072140885989742329E1,
+           3.54937778887819891062E2, 9.75708501743205489753E2,
+           1.82390916687909736289E3, 2.24633760818710981792E3,
+           1.65666309194161350182E3, 5.57535340817727675546E2]
+_ERFC_R = [5.64189583547755073984E-1, 1.27536670759978104416E0,
+           5.01905042251180477414E0, 6.16021097993053585195E0,
+           7.40974269950448939160E0, 2.97886665372100240670E0]
+_ERFC_S = [1.0, 2.26052863220117276590E0, 9.39603524938001434673E0,
+           1.20489539808096656605E1, 1.70814450747565897222E1,
+           9.60896809063285878198E0, 3.36907645100081516050E0]
+_ERF_T = [9.60497373987051638749E0, 9.00260197203842689217E1,
+          2.23200534594684319226E3, 7.00332514112805075473E3,
+          5.55923013010394962768E4]
+_ERF_U = [1.0, 3.35617141647503099647E1, 5.21357949780152679795E2,
+          4.59432382970980127987E3, 2.26290000613890934246E4,
+          4.92673942608635921086E4]
+
+# Coefficients of the Stirling series for log(Gamma(x))
+_STIRLING = [1.0 / 12, -1.0 / 360, 1.0 / 1260, -1.0 / 1680, 1.0 / 1188]
+_STIRLING_MIN = 10.0
+
+
+def _erf_small(x):
+    """Function to evaluate erf(x) for |x| <= 1.
+
+    Args:
+        x (array): points to evaluate
+
+    Returns:
+        array: erf(x)
+    """
+    z = x * x
+    return x * np.polyval(_ERF_T, z) / np.polyval(_ERF_U, z)
+
+
+def _erfc_large(x):
+    """Function to evaluate erfc(x) for x >= 1.
+
+    Args:
+        x (array): points to evaluate
+
+    Returns:
+        array: erfc(x)
+    """
+    with np.errstate(under='ignore'):
+        z = np.exp(-x * x)
+    p = np.where(x < 8.0, np.polyval(_ERFC_P, x), np.polyval(_ERFC_R, x))
+    q = np.where(x < 8.0, np.polyval(_ERFC_Q, x), np.polyval(_ERFC_S, x))
+    return z * p / q
+
+
+def erfc(x):
+    """Complementary error function evaluated elementwise.
+
+    Args:
+        x (float or array): points to evaluate
+
+    Returns:
+        array: erfc(x)
+    """
+    x = np.asarray(x, dtype=float)
+    a = np.abs(x)
+    small = a <= 1.0
+    # evaluate each branch on a clipped input so no branch sees values
+    # outside of its domain
+    tail = _erfc_large(np.maximum(a, 1.0))
+    tail = np.where(x < 0, 2.0 - tail, tail)
+    return np.where(small, 1.0 - _erf_small(np.where(small, x, 0.0)), tail)
+
+
+def erf(x):
+    """Error function evaluated elementwise.
+
+    Args:
+        x (float or array): points to evaluate
+
+    Returns:
+        array: erf(x)
+    """
+    x = np.asarray(x, dtype=float)
+    small = np.abs(x) <= 1.0
+    return np.where(small, _erf_small(np.where(small, x, 0.0)), 1.0 - erfc(x))
+
+
+def gammaln(x):
+    """Natural logarithm of the gamma function for positive arguments,
+    evaluated elementwise.
+
+    Arguments below 10 are shifted up with the recurrence
+    Gamma(x + 1) = x * Gamma(x) before the Stirling series is applied.
+
+    Args:
+        x (float or array): positive points to evaluate
+
+    Returns:
+        array: log(Gamma(x))
+    """
+    x = np.asarray(x, dtype=float)
+    shift = np.zeros_like(x)
+    y = x.copy()
+    # at most ten multiplications are needed to reach the Stirling range
+    for _ in range(int(_STIRLING_MIN)):
+        low = y < _STIRLING_MIN
+        if not np.any(low):
+            break
+        shift = np.where(low, shift + np.log(np.where(low, y, 1.0)), shift)
+        y = np.where(low, y + 1.0, y)
+
+    inv = 1.0 / y
+    inv2 = inv * inv
+    series = inv * np.polyval(_STIRLING[::-1], inv2)
+    return ((y - 0.5) * np.log(y) - y + 0.5 * math.log(2 * math.pi)
+            + series - shift)
@@ -0,0 +1,475 @@
+
+import math
+import numpy as np
+
+
+class SummaryStatistics:
+    """ Running summary of a data set that is updated one value at a time
+    with Welford's algorithm, so a data set can be described in a single
+    pass without keeping it in memory.
+
+    Attributes:
+        count (int) number of values seen
+        mean (float) running mean of the values
+        m2 (float) running sum of squared differences from the mean
+        min (float) smallest value seen
+        max (float) largest value seen
+
+    """
+
+    def __init__(self):
+
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, x):
+        """Function to add one value to the summary.
+
+        Args:
+            x (float): value to add
+
+        Returns:
+            None
+
+        """
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @classmethod
+    def from_array(cls, values, weights=None):
+        """Function to describe an array of values with vectorized operations.
+        With weights, each value counts weights times, so grouped data can be
+        given as value/count pairs and the count becomes the total weight.
+
+        Args:
+            values (array): values to describe
+            weights (array): optional count or weight of each value
+
+        Returns:
+            SummaryStatistics: summary of the values
+
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        summary = cls()
+
+        if weights is None:
+            n = values.size
+            weights = 1.0
+        else:
+            weights = np.asarray(weights, dtype=float).ravel()
+            n = float(weights.sum())
+            values = values[weights > 0]
+            weights = weights[weights > 0]
+
+        if values.size == 0:
+            return summary
+
+        # corrected two-pass algorithm: the sum of the deviations is zero in
+        # exact arithmetic, so it measures and compensates the rounding error
+        # of the first pass
+        mean = np.sum(weights * values) / n
+        dev = values - mean
+        dev_sum = np.sum(weights * dev)
+
+        summary.count = n
+        summary.mean = float(mean + dev_sum / n)
+        summary.m2 = float(np.sum(weights * np.square(dev)) - dev_sum * dev_sum / n)
+        summary.min = float(values.min())
+        summary.max = float(values.max())
+
+        return summary
+
+    def update_batch(self, values):
+        """Function to add an array of values to the summary. The batch is
+        described with vectorized operations and then merged into the running
+        totals.
+
+        Args:
+            values (array): values to add
+
+        Returns:
+            None
+
+        """
+        self.merge(SummaryStatistics.from_array(values))
+
+    def remove_batch(self, values):
+        """Function to take an array of values that were added before out of
+        the summary. The minimum and maximum cannot be undone and remain
+        bounds of the values seen.
+
+        Args:
+            values (array): values to remove
+
+        Returns:
+            None
+
+        """
+        self.subtract(SummaryStatistics.from_array(values))
+
+    def merge(self, other):
+        """Function to fold another summary into this one with the parallel
+        variance formula of Chan et al. The result is the same as if all
+        values had been added to a single summary, so data sets can be
+        summarized in separate chunks or processes and combined afterwards.
+
+        Args:
+            other (SummaryStatistics): summary to merge in
+
+        Returns:
+            SummaryStatistics: this summary
+
+        """
+        if other.count == 0:
+            return self
+
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta * delta * self.count * other.count / n
+        self.count = n
+
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+        return self
+
+    def subtract(self, other):
+        """Function to take a summary of a part of the data out of this one,
+        the inverse of merge.
+
+        Args:
+            other (SummaryStatistics): summary of values contained in this one
+
+        Returns:
+            SummaryStatistics: this summary
+
+        """
+        if other.count == 0:
+            return self
+
+        n = self.count - other.count
+
+        if n < 0:
+            raise ValueError('cannot remove more values than were added')
+        if n == 0:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return self
+
+        mean = (self.count * self.mean - other.count * other.mean) / n
+        delta = other.mean - mean
+        self.m2 = max(self.m2 - other.m2 - delta * delta * n * other.count / self.count, 0.0)
+        self.mean = mean
+        self.count = n
+
+        return self
+
+    @property
+    def sum(self):
+        """Sum of the values seen so far."""
+        return self.mean * self.count
+
+    def variance(self, sample=True):
+        """Function to calculate the variance of the values seen so far.
+
+        Args:
+            sample (bool): whether the data represents a sample or population
+
+        Returns:
+            float: variance of the data set
+
+        """
+        n = self.count - 1 if sample else self.count
+
+        if n <= 0:
+            return math.nan
+
+        return self.m2 / n
+
+    def stdev(self, sample=True):
+        """Function to calculate the standard deviation of the values seen so far.
+
+        Args:
+            sample (bool): whether the data represents a sample or population
+
+        Returns:
+            float: standard deviation of the data set
+
+        """
+        return math.sqrt(self.variance(sample))
+
+    def __add__(self, other):
+
+        """Function to combine two summaries into a new one
+
+        Args:
+            other (SummaryStatistics): summary instance
+
+        Returns:
+            SummaryStatistics: summary of both data sets
+
+        """
+
+        result = SummaryStatistics()
+        result.merge(self)
+        result.merge(other)
+
+        return result
+
+    def __repr__(self):
+
+        """Function to output the characteristics of the summary
+
+        Args:
+            None
+
+        Returns:
+            string: characteristics of the summary
+
+        """
+
+        return 'count {}, mean {}, min {}, max {}'.format(
+            self.count, self.mean, self.min, self.max
+        )
+
+
+class BinomialSummary:
+    """ Running summary of a data set of zeros and ones. The number of
+    trials and successes are sufficient statistics for a binomial
+    distribution and merge by simple addition.
+
+    Attributes:
+        trials (int) number of outcomes seen
+        successes (int) number of outcomes equal to one
+
+    """
+
+    def __init__(self, trials=0, successes=0):
+
+        self.trials = trials
+        self.successes = successes
+
+    def update(self, x):
+        """Function to add one outcome to the summary.
+
+        Args:
+            x (int): outcome to add, 0 or 1
+
+        Returns:
+            None
+
+        """
+        self.trials += 1
+        self.successes += int(x)
+
+    def update_batch(self, values):
+        """Function to add an array of outcomes to the summary.
+
+        Args:
+            values (array): outcomes to add
+
+        Returns:
+            None
+
+        """
+        self.merge(BinomialSummary.from_array(values))
+
+    def remove_batch(self, values):
+        """Function to take an array of outcomes that were added before out
+        of the summary.
+
+        Args:
+            values (array): outcomes to remove
+
+        Returns:
+            None
+
+        """
+        self.subtract(BinomialSummary.from_array(values))
+
+    @classmethod
+    def from_array(cls, values, weights=None):
+        """Function to count the trials and successes of an array of outcomes.
+
+        Args:
+            values (array): outcomes to describe
+            weights (array): optional count of each outcome, whole numbers
+                (e.g. float histogram counts) as trials are counted in ints
+
+        Returns:
+            BinomialSummary: summary of the outcomes
+
+        """
+        values = np.asarray(values)
+
+        if weights is None:
+            return cls(int(values.size), int(np.count_nonzero(values)))
+
+        weights = np.asarray(weights, dtype=float)
+        counts = np.rint(weights)
+        if not np.allclose(weights, counts, rtol=0, atol=1e-9) or (counts < 0).any():
+            raise ValueError('binomial weights must be whole, non negative counts')
+        counts = counts.astype(np.int64)
+
+        return cls(int(counts.sum()), int(counts[values != 0].sum()))
+
+    def merge(self, other):
+        """Function to fold another summary into this one.
+
+        Args:
+            other (BinomialSummary): summary to merge in
+
+        Returns:
+            BinomialSummary: this summary
+
+        """
+        self.trials += other.trials
+        self.successes += other.successes
+
+        return self
+
+    def subtract(self, other):
+        """Function to take a summary of a part of the data out of this one,
+        the inverse of merge.
+
+        Args:
+            other (BinomialSummary): summary of outcomes contained in this one
+
+        Returns:
+            BinomialSummary: this summary
+
+        """
+        if other.trials > self.trials:
+            raise ValueError('cannot remove more values than were added')
+
+        self.trials -= other.trials
+        self.successes -= other.successes
+
+        return self
+
+    @property
+    def count(self):
+        """Number of outcomes seen so far."""
+        return self.trials
+
+    @property
+    def mean(self):
+        """Fraction of successes seen so far."""
+        return self.successes / self.trials
+
+    def __add__(self, other):
+
+        """Function to combine two summaries into a new one
+
+        Args:
+            other (BinomialSummary): summary instance
+
+        Returns:
+            BinomialSummary: summary of both data sets
+
+        """
+
+        return BinomialSummary(self.trials + other.trials,
+                               self.successes + other.successes)
+
+    def __repr__(self):
+
+        """Function to output the characteristics of the summary
+
+        Args:
+            None
+
+        Returns:
+            string: characteristics of the summary
+
+        """
+
+        return 'trials {}, successes {}'.format(self.trials, self.successes)
+
+
+class SlidingWindow:
+    """ Summary of the most recent values of a stream. The window is kept
+    in a ring buffer; new values are merged into the summary and the values
+    they push out are subtracted, so every update costs time proportional
+    to the batch, not to the window.
+
+    Subtracting accumulates rounding error, so the summary is recomputed
+    from the buffer each time a full window of values has been replaced,
+    which adds amortized O(1) work per value.
+
+    Attributes:
+        size (int) number of values in a full window
+        summary (summary_class) summary of the values in the window
+
+    """
+
+    def __init__(self, size, summary_class=SummaryStatistics):
+
+        self.size = size
+        self.summary_class = summary_class
+        self.summary = summary_class()
+        self.buffer = np.empty(size)
+        self.start = 0
+        self.count = 0
+        self.replaced = 0
+
+    def values(self):
+        """Function to return the values in the window, oldest first.
+
+        Args:
+            None
+
+        Returns:
+            array: values in the window
+
+        """
+        idx = (self.start + np.arange(self.count)) % self.size
+
+        return self.buffer[idx]
+
+    def push(self, values):
+        """Function to add values to the window, dropping the oldest ones
+        once it is full.
+
+        Args:
+            values (array): values to add
+
+        Returns:
+            array: values that left the window
+
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        evicted = values[:-self.size]
+        # values older than the last window are dropped right away
+        values = values[-self.size:]
+        n = values.size
+
+        overflow = self.count + n - self.size
+        if overflow > 0:
+            idx = (self.start + np.arange(overflow)) % self.size
+            evicted = np.concatenate([self.buffer[idx], evicted])
+            self.summary.remove_batch(self.buffer[idx])
+            self.start = (self.start + overflow) % self.size
+            self.count -= overflow
+            self.replaced += overflow
+
+        idx = (self.start + self.count + np.arange(n)) % self.size
+        self.buffer[idx] = values
+        self.count += n
+        self.summary.update_batch(values)
+
+        if self.replaced >= self.size:
+            self.summary = self.summary_class.from_array(self.values())
+            self.replaced = 0
+
+        return evicted
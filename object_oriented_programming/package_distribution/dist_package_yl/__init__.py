@@ -1,3 +1,9 @@
 
 from .Gaussiandistribution import Gaussian
-from .Binomialdistribution import Binomial
\ No newline at end of file
+from .Binomialdistribution import Binomial
+from .Discretedistribution import Discrete
+from .Distributionbatch import DistributionBatch, GaussianBatch, BinomialBatch
+from .Histogram import Histogram
+from .Convolution import sum_distributions
+from .Parallelfit import fit_parallel
+from .Serialization import save, load
\ No newline at end of file
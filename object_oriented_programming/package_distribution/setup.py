@@ -4,6 +4,8 @@ setup(name='dist_package_yl',
       version='0.1',
       description='Gaussian distributions',
       packages=['dist_package_yl'],
+      install_requires=['numpy'],
+      extras_require={'plot': ['matplotlib']},
       author = 'Yang Lyu',
       author_email = 'smart.lvyang@gmail.com',
       zip_safe=False)